@@ -0,0 +1,368 @@
+import contextlib
+import json
+import math
+import os
+import queue
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from .processing.aggregates import AreaAggregates
+from .processing.pdf_engine import process_pdf
+from .processing.progress import ExtractionCancelled, ExtractionTimeout
+from .profiling import JobProfiler, purge_profiles
+from .taskqueue import get_task_queue, run_distributed_job
+
+# Admission control settings (override through environment variables)
+MAX_WORKERS = int(os.environ.get("VOTER_MAX_WORKERS", "2"))
+MAX_QUEUE_DEPTH = int(os.environ.get("VOTER_MAX_QUEUE_DEPTH", "8"))
+# Timeout = base + per_page * page_count, measured from when the job starts running
+JOB_TIMEOUT_BASE = float(os.environ.get("VOTER_JOB_TIMEOUT_BASE", "60"))
+JOB_TIMEOUT_PER_PAGE = float(os.environ.get("VOTER_JOB_TIMEOUT_PER_PAGE", "15"))
+# Retry-After used before any job has finished and we have no measured duration
+DEFAULT_RETRY_AFTER = 30
+# Finished jobs (and their voters) are dropped from memory this long after they end
+JOB_TTL = float(os.environ.get("VOTER_JOB_TTL", "3600"))
+
+FINAL_STATES = ("completed", "failed", "cancelled", "timed_out")
+
+AGGREGATES_DIR = os.path.join(os.path.abspath("."), "uploads", "aggregates")
+
+class QueueFull(Exception):
+    """Raised by JobManager.submit when the server is saturated."""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Server is busy, please retry later")
+        self.retry_after = retry_after
+
+class AggregateStore:
+    """
+    Per-area aggregates of completed jobs, kept after the job itself and its
+    voters are gone (discarded by /api/upload, evicted after JOB_TTL, or lost
+    in a restart). One JSON file per job holds its metadata and counters;
+    `merged` is updated as jobs complete, so server-wide roll-ups never
+    re-read per-job data.
+    """
+
+    def __init__(self, directory: str = AGGREGATES_DIR):
+        self.directory = directory
+        self._jobs: Optional[Dict[str, AreaAggregates]] = None
+        self._merged = AreaAggregates()
+        self._lock = threading.Lock()
+
+    def _path(self, job_id: str) -> str:
+        return os.path.join(self.directory, f"{job_id}.json")
+
+    def _load(self):
+        # Called with _lock held; reads what earlier runs stored, once
+        if self._jobs is not None:
+            return
+        self._jobs = {}
+        if not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.directory, name), encoding="utf-8") as f:
+                    data = json.load(f)
+                aggregates = AreaAggregates.from_state(data["areas"])
+            except (OSError, ValueError, KeyError) as e:
+                print(f"[WARNING] Skipping stored aggregates {name}: {e}")
+                continue
+            self._jobs[data["job_id"]] = aggregates
+            self._merged.merge(aggregates)
+
+    def save(self, job: "Job"):
+        state = {
+            "job_id": job.job_id,
+            "metadata": job.metadata,
+            "finished_at": job.finished_at,
+            "areas": job.aggregates.to_state(),
+        }
+        with self._lock:
+            self._load()
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                tmp_path = self._path(job.job_id) + ".tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(state, f, ensure_ascii=False)
+                os.replace(tmp_path, self._path(job.job_id))
+            except OSError as e:
+                # Still served from memory until the next restart
+                print(f"[WARNING] Failed to store aggregates of job {job.job_id}: {e}")
+            self._jobs[job.job_id] = job.aggregates
+            self._merged.merge(job.aggregates)
+
+    def get(self, job_id: str) -> Optional[AreaAggregates]:
+        with self._lock:
+            self._load()
+            return self._jobs.get(job_id)
+
+    def merged(self) -> AreaAggregates:
+        with self._lock:
+            self._load()
+            return self._merged
+
+class Job:
+    """
+    A single extraction job. Progress events are appended to `events` from the
+    worker thread and read by index from the SSE endpoint, so publishing never
+    blocks the extraction loop.
+    """
+
+    def __init__(
+        self,
+        job_id: str,
+        file_path: str,
+        metadata: dict,
+        profile: bool = False,
+        aggregate_store: Optional[AggregateStore] = None
+    ):
+        self.job_id = job_id
+        self.file_path = file_path
+        self.metadata = metadata
+        # Run under JobProfiler and keep the artifacts (admin-only, see main.py)
+        self.profile = profile
+        self.profile_summary: Optional[dict] = None
+        self.status = "queued"
+        self.voters = []
+        # Per-area statistics, updated as voters are extracted (see /api/jobs/{id}/aggregates)
+        self.aggregates = AreaAggregates()
+        self.aggregate_store = aggregate_store
+        self.error: Optional[str] = None
+        self.events: List[dict] = []
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.deadline: Optional[float] = None
+        self.cancel_requested = threading.Event()
+        self._state_lock = threading.Lock()
+
+    @property
+    def done(self) -> bool:
+        return self.status in FINAL_STATES
+
+    def publish(self, event: dict):
+        # The first event carrying the page count fixes the timeout for this job
+        if self.deadline is None and event.get("total_pages"):
+            self.deadline = time.monotonic() + JOB_TIMEOUT_BASE + JOB_TIMEOUT_PER_PAGE * event["total_pages"]
+
+        # list.append is atomic under the GIL - no lock needed on the hot path
+        self.events.append(event)
+
+    def checkpoint(self):
+        """
+        Called by the extraction loop between pages and tables.
+        """
+        if self.cancel_requested.is_set():
+            raise ExtractionCancelled("Job was cancelled")
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise ExtractionTimeout("Job exceeded its time limit")
+
+    def cancel(self):
+        with self._state_lock:
+            self.cancel_requested.set()
+            if self.status == "queued":
+                # Never reached a worker - finish right away, the worker will skip it
+                self._finish("cancelled", "Job was cancelled")
+
+    def run(self):
+        with self._state_lock:
+            if self.status != "queued":
+                return
+            self.status = "running"
+            self.started_at = time.time()
+
+        self.publish({"stage": "started"})
+        profiler = JobProfiler(self.job_id) if self.profile else contextlib.nullcontext()
+        try:
+            # The profile is saved on the way out even if the job fails or times out
+            with profiler:
+                self.voters = self._extract()
+            self._finish("completed")
+        except ExtractionTimeout as e:
+            self._finish("timed_out", str(e))
+        except ExtractionCancelled as e:
+            self._finish("cancelled", str(e))
+        except Exception as e:
+            self._finish("failed", str(e))
+        finally:
+            if self.profile:
+                self.profile_summary = profiler.summary
+
+    def _extract(self):
+        task_queue = get_task_queue()
+        # Profiled jobs always run here: distributed, the profile would only
+        # cover the coordinator's poll loop, not the extraction
+        if task_queue is not None and not self.profile:
+            # Distributed mode: this thread only coordinates, workers do the pages
+            return run_distributed_job(
+                task_queue, self.job_id, self.file_path, self.metadata,
+                progress=self.publish, checkpoint=self.checkpoint, aggregates=self.aggregates
+            )
+        return process_pdf(
+            self.file_path, self.metadata,
+            progress=self.publish, checkpoint=self.checkpoint, aggregates=self.aggregates
+        )
+
+    def _finish(self, status: str, error: Optional[str] = None):
+        self.error = error
+        self.finished_at = time.time()
+        if status != "completed":
+            self.publish({"stage": status, "error": error})
+            self.voters = []
+            self.aggregates = AreaAggregates()
+            remove_upload(self.file_path)
+        elif self.aggregate_store is not None:
+            # Before the status flips: /api/upload discards the job as soon as it is done
+            self.aggregate_store.save(self)
+        self.status = status
+
+def remove_upload(file_path: str):
+    try:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+    except OSError as e:
+        print(f"[WARNING] Failed to remove upload {file_path}: {e}")
+
+class JobManager:
+    """
+    Bounded job queue served by a fixed pool of worker threads.
+    At most `max_workers` extractions run at once and at most `max_queue_depth`
+    more wait for a worker; anything beyond that is rejected with QueueFull.
+    Finished jobs stay available for job_ttl seconds, then are evicted.
+    In distributed mode (VOTER_QUEUE_DB set) the threads coordinate jobs whose
+    pages are processed by backend.worker processes.
+    """
+
+    def __init__(self, max_workers: int = MAX_WORKERS, max_queue_depth: int = MAX_QUEUE_DEPTH, job_ttl: float = JOB_TTL):
+        self.max_workers = max_workers
+        self.max_queue_depth = max_queue_depth
+        self.job_ttl = job_ttl
+        self.jobs: Dict[str, Job] = {}
+        self.aggregate_store = AggregateStore()
+        # The queue itself is unbounded; admission is decided on _waiting, which
+        # a job leaves as soon as it is cancelled - not when a worker pops it
+        self._queue: "queue.Queue[Job]" = queue.Queue()
+        self._waiting = set()
+        self._workers: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._running = 0
+        self._avg_duration: Optional[float] = None
+
+    def _ensure_workers(self):
+        with self._lock:
+            while len(self._workers) < self.max_workers:
+                worker = threading.Thread(
+                    target=self._worker_loop,
+                    name=f"extraction-worker-{len(self._workers)}",
+                    daemon=True
+                )
+                worker.start()
+                self._workers.append(worker)
+
+    def _worker_loop(self):
+        while True:
+            job = self._queue.get()
+            with self._lock:
+                self._waiting.discard(job.job_id)
+                self._running += 1
+            try:
+                job.run()
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    if job.started_at and job.finished_at:
+                        self._record_duration(job.finished_at - job.started_at)
+                self._queue.task_done()
+
+    def _record_duration(self, duration: float):
+        # Exponential moving average of job run time, used for Retry-After
+        if self._avg_duration is None:
+            self._avg_duration = duration
+        else:
+            self._avg_duration = 0.8 * self._avg_duration + 0.2 * duration
+
+    def retry_after(self) -> int:
+        if self._avg_duration is None:
+            return DEFAULT_RETRY_AFTER
+        waiting = len(self._waiting) + self._running
+        return max(1, math.ceil(self._avg_duration * waiting / self.max_workers))
+
+    def submit(self, file_path: str, metadata: dict, job_id: Optional[str] = None, profile: bool = False) -> Job:
+        self._ensure_workers()
+        self.evict_expired()
+
+        job = Job(
+            job_id or str(uuid.uuid4()), file_path, metadata,
+            profile=profile, aggregate_store=self.aggregate_store
+        )
+        with self._lock:
+            full = len(self._waiting) >= self.max_queue_depth
+            if not full:
+                self._waiting.add(job.job_id)
+                self.jobs[job.job_id] = job
+        if full:
+            raise QueueFull(self.retry_after())
+
+        self._queue.put(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.jobs.get(job_id)
+
+    def discard(self, job_id: str):
+        """
+        Forgets a finished job, e.g. once /api/upload has returned its result.
+        """
+        self.jobs.pop(job_id, None)
+
+    def evict_expired(self):
+        """
+        Drops jobs that finished more than job_ttl seconds ago, and profile
+        artifacts older than that (including those of discarded jobs).
+        """
+        cutoff = time.time() - self.job_ttl
+        for job_id, job in list(self.jobs.items()):
+            if job.done and job.finished_at is not None and job.finished_at < cutoff:
+                self.jobs.pop(job_id, None)
+        purge_profiles(cutoff)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """
+        Requests cancellation. A queued job is finished immediately and skipped
+        by the worker; a running job stops at its next page/table checkpoint.
+        """
+        job = self.jobs.get(job_id)
+        if job is not None and not job.done:
+            job.cancel()
+            if job.done:
+                # Finished while still queued: free its slot now, the worker skips it later
+                with self._lock:
+                    self._waiting.discard(job.job_id)
+        return job
+
+    def aggregates(self) -> AreaAggregates:
+        """
+        Statistics of all completed jobs merged together, for roll-ups across
+        uploads - including jobs that have since been evicted.
+        """
+        return self.aggregate_store.merged()
+
+    def job_aggregates(self, job_id: str) -> Optional[AreaAggregates]:
+        """
+        Aggregates of a completed job that is no longer in memory.
+        """
+        return self.aggregate_store.get(job_id)
+
+    def stats(self) -> dict:
+        return {
+            "max_workers": self.max_workers,
+            "max_queue_depth": self.max_queue_depth,
+            "running": self._running,
+            "queued": len(self._waiting),
+        }
+
+job_manager = JobManager()
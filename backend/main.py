@@ -1,13 +1,30 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException, Form
+from fastapi import FastAPI, UploadFile, File, HTTPException, Form, Header, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, FileResponse, Response
 from fastapi.staticfiles import StaticFiles
+from typing import Optional
+import asyncio
+import hashlib
+import hmac
+import json
 import shutil
 import os
 import sys
 import uuid
 import webbrowser
-from .processing.pdf_engine import process_pdf
-from .models import ExtractionResult
+from .processing.aggregates import ROLLUP_LEVELS
+from .processing.normalizer import convert_bengali_to_english_numerals
+from .processing.records import records_to_dicts
+from .models import (
+    ExtractionResult, JobStatus,
+    WorkerLeaseRequest, WorkerTask, TaskHeartbeat, TaskCompletion, TaskFailure,
+    UploadInit, UploadStatus, UploadFinalize
+)
+from .jobs import job_manager, remove_upload, QueueFull, Job
+from .profiling import profile_path
+from .taskqueue import get_task_queue, LEASE_SECONDS
+from .uploads import UploadSessionStore, UploadError, positional_write
 
 # Function to get resource path for PyInstaller
 def resource_path(relative_path):
@@ -33,6 +50,94 @@ app.add_middleware(
 UPLOAD_DIR = os.path.join(os.path.abspath("."), "uploads")
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
+upload_sessions = UploadSessionStore(UPLOAD_DIR)
+
+SSE_POLL_INTERVAL = 0.25
+JOB_POLL_INTERVAL = 0.2
+
+# Admin-only features (per-job profiling) are disabled unless a token is configured
+ADMIN_TOKEN = os.environ.get("VOTER_ADMIN_TOKEN")
+
+def require_admin(token: Optional[str]):
+    if not ADMIN_TOKEN or not token or not hmac.compare_digest(token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+# Remote extraction workers authenticate with this token (distributed mode only)
+WORKER_TOKEN = os.environ.get("VOTER_WORKER_TOKEN")
+
+def require_worker(token: Optional[str]):
+    if get_task_queue() is None:
+        raise HTTPException(status_code=404, detail="Distributed extraction is not enabled")
+    if not WORKER_TOKEN or not token or not hmac.compare_digest(token, WORKER_TOKEN):
+        raise HTTPException(status_code=403, detail="Worker token required")
+
+def build_metadata(district: str, upazila: str, union: str, ward_number: str, voter_area: str, voter_area_code: str) -> dict:
+    """
+    Create metadata dict from form inputs
+    """
+    metadata = {
+        "district": district or "Unavailable",
+        "upazila": upazila or "Unavailable",
+        "union": union or "Unavailable",
+        "ward_number": ward_number or "Unavailable",
+        "voter_area": voter_area or "Unavailable",
+        "voter_area_code": voter_area_code or "Unavailable"
+    }
+    
+    # Convert Bengali numerals to English in metadata
+    if metadata["ward_number"] != "Unavailable":
+        metadata["ward_number"] = convert_bengali_to_english_numerals(metadata["ward_number"])
+    if metadata["voter_area_code"] != "Unavailable":
+        metadata["voter_area_code"] = convert_bengali_to_english_numerals(metadata["voter_area_code"])
+    
+    return metadata
+
+def save_upload(file: UploadFile) -> tuple:
+    if not file.filename.endswith('.pdf'):
+        raise HTTPException(status_code=400, detail="Only PDF files are allowed")
+    
+    file_id = str(uuid.uuid4())
+    file_path = os.path.join(UPLOAD_DIR, f"{file_id}.pdf")
+    
+    with open(file_path, "wb") as buffer:
+        shutil.copyfileobj(file.file, buffer)
+    
+    return file_id, file_path
+
+def submit_job(file_id: str, file_path: str, metadata: dict, profile: bool = False) -> Job:
+    """
+    Hands an uploaded file to the job queue, answering 429 when the server is saturated.
+    """
+    try:
+        return job_manager.submit(file_path, metadata, job_id=file_id, profile=profile)
+    except QueueFull as e:
+        remove_upload(file_path)
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+def extraction_response(job: Job) -> dict:
+    """
+    Builds the ExtractionResult payload from internal records as plain dicts.
+    FastAPI validates it against the response model exactly once on the way out,
+    instead of once per Voter plus again for the whole ExtractionResult.
+    """
+    return {
+        "job_id": job.job_id,
+        "status": job.status,
+        "total_voters": len(job.voters),
+        "data": records_to_dicts(job.voters) if job.done else []
+    }
+
+def job_error_status(job: Job) -> int:
+    if job.status == "timed_out":
+        return 504
+    if job.status == "cancelled":
+        return 409
+    return 500
+
 @app.post("/api/upload", response_model=ExtractionResult)
 async def upload_file(
     file: UploadFile = File(...),
@@ -41,49 +146,333 @@ async def upload_file(
     union: str = Form(""),
     ward_number: str = Form(""),
     voter_area: str = Form(""),
-    voter_area_code: str = Form("")
+    voter_area_code: str = Form(""),
+    profile: bool = Form(False),
+    x_admin_token: Optional[str] = Header(None)
 ):
-    if not file.filename.endswith('.pdf'):
-        raise HTTPException(status_code=400, detail="Only PDF files are allowed")
+    if profile:
+        require_admin(x_admin_token)
     
-    file_id = str(uuid.uuid4())
-    file_path = os.path.join(UPLOAD_DIR, f"{file_id}.pdf")
+    file_id, file_path = save_upload(file)
+    metadata = build_metadata(district, upazila, union, ward_number, voter_area, voter_area_code)
+    
+    # Processing with user-provided metadata, through the same bounded queue as /api/jobs
+    job = submit_job(file_id, file_path, metadata, profile=profile)
+    while not job.done:
+        await asyncio.sleep(JOB_POLL_INTERVAL)
     
+    # Nobody polls a synchronous upload later - don't keep its voters around
+    job_manager.discard(job.job_id)
+    if job.status != "completed":
+        raise HTTPException(status_code=job_error_status(job), detail=job.error)
+    
+    return extraction_response(job)
+
+@app.post("/api/jobs", response_model=JobStatus)
+async def create_extraction_job(
+    file: UploadFile = File(...),
+    district: str = Form(""),
+    upazila: str = Form(""),
+    union: str = Form(""),
+    ward_number: str = Form(""),
+    voter_area: str = Form(""),
+    voter_area_code: str = Form(""),
+    profile: bool = Form(False),
+    x_admin_token: Optional[str] = Header(None)
+):
+    """
+    Starts an extraction in the background. Follow its progress on
+    /api/jobs/{job_id}/events and fetch the result from /api/jobs/{job_id}.
+    With profile=true (admin only) the job runs under the profiler and its
+    artifacts are served from /api/jobs/{job_id}/profile. Profiled jobs are
+    extracted on this server even when distributed extraction is on.
+    """
+    if profile:
+        require_admin(x_admin_token)
+    
+    file_id, file_path = save_upload(file)
+    metadata = build_metadata(district, upazila, union, ward_number, voter_area, voter_area_code)
+    
+    job = submit_job(file_id, file_path, metadata, profile=profile)
+    return JobStatus(job_id=job.job_id, status=job.status)
+
+def current_rss_bytes() -> Optional[int]:
+    """
+    Resident set size of this process, or None where it cannot be read.
+    """
     try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        # Create metadata dict from form inputs
-        metadata = {
-            "district": district or "Unavailable",
-            "upazila": upazila or "Unavailable",
-            "union": union or "Unavailable",
-            "ward_number": ward_number or "Unavailable",
-            "voter_area": voter_area or "Unavailable",
-            "voter_area_code": voter_area_code or "Unavailable"
-        }
-        
-        # Convert Bengali numerals to English in metadata
-        from .processing.normalizer import convert_bengali_to_english_numerals
-        if metadata["ward_number"] != "Unavailable":
-            metadata["ward_number"] = convert_bengali_to_english_numerals(metadata["ward_number"])
-        if metadata["voter_area_code"] != "Unavailable":
-            metadata["voter_area_code"] = convert_bengali_to_english_numerals(metadata["voter_area_code"])
-            
-        # Processing with user-provided metadata
-        voters = process_pdf(file_path, metadata)
-        
-        return ExtractionResult(
-            job_id=file_id,
-            status="completed",
-            total_voters=len(voters),
-            data=voters
-        )
-            
-    except Exception as e:
-        if os.path.exists(file_path):
-            os.remove(file_path)
-        raise HTTPException(status_code=500, detail=str(e))
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+@app.get("/api/stats")
+async def get_stats():
+    """
+    Worker pool and memory snapshot, polled by benchmarks/load_test.py.
+    """
+    return {"rss_bytes": current_rss_bytes(), **job_manager.stats()}
+
+# Chunked, resumable uploads: POST /api/uploads, then PUT chunks at offsets
+# (GET the session to find where to resume), then POST .../finalize.
+
+def get_upload_session(upload_id: str):
+    session = upload_sessions.get(upload_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return session
+
+@app.post("/api/uploads", response_model=UploadStatus)
+async def init_upload(request: UploadInit):
+    metadata = build_metadata(
+        request.district, request.upazila, request.union,
+        request.ward_number, request.voter_area, request.voter_area_code
+    )
+    try:
+        session = upload_sessions.create(request.filename, request.size, request.sha256, metadata, request.chunk_size)
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    return session.to_dict()
+
+@app.get("/api/uploads/{upload_id}", response_model=UploadStatus)
+async def get_upload_status(upload_id: str):
+    return get_upload_session(upload_id).to_dict()
+
+@app.put("/api/uploads/{upload_id}", response_model=UploadStatus)
+async def upload_chunk(upload_id: str, offset: int, request: Request):
+    """
+    Writes the raw request body at `offset`. The body is streamed to disk
+    piece by piece with positional writes, never held in memory as a whole.
+    Sessions created with a chunk_size need the chunk's hash in X-Chunk-Sha256.
+    """
+    session = get_upload_session(upload_id)
+    content_length = request.headers.get("content-length")
+    chunk_hash = request.headers.get("x-chunk-sha256")
+    if session.chunk_size and not chunk_hash:
+        raise HTTPException(status_code=400, detail="X-Chunk-Sha256 header is required for this upload")
+    digest = hashlib.sha256() if session.chunk_size else None
+    
+    try:
+        fd = upload_sessions.open_for_write(session, offset, int(content_length) if content_length else None)
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    
+    position = offset
+    try:
+        async for piece in request.stream():
+            if position + len(piece) > session.total_size:
+                raise HTTPException(status_code=416, detail="Chunk extends past the declared file size")
+            positional_write(fd, piece, position)
+            if digest is not None:
+                digest.update(piece)
+            position += len(piece)
+    finally:
+        os.close(fd)
+        # Whatever arrived before a dropped connection still counts
+        if position > offset and digest is None:
+            session.record_chunk(offset, position)
+    
+    if digest is not None:
+        # A hashed chunk only counts once it arrived whole and intact
+        if position != session.chunk_end(offset):
+            raise HTTPException(status_code=400, detail="Chunks must be sent whole")
+        if digest.hexdigest() != chunk_hash.lower():
+            raise HTTPException(status_code=422, detail="Chunk sha256 mismatch - send it again")
+        session.record_chunk(offset, position, chunk_hash.lower())
+    
+    return session.to_dict()
+
+@app.post("/api/uploads/{upload_id}/finalize", response_model=JobStatus)
+async def finalize_upload(upload_id: str, request: UploadFinalize):
+    """
+    Verifies the sha256 of the assembled file and hands it straight to extraction.
+    On 429 the upload is kept, so finalize can simply be retried.
+    """
+    session = get_upload_session(upload_id)
+    try:
+        await run_in_threadpool(upload_sessions.verify, session, request.sha256)
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    
+    file_path = os.path.join(UPLOAD_DIR, f"{upload_id}.pdf")
+    os.replace(session.part_path, file_path)
+    try:
+        job = job_manager.submit(file_path, session.state["metadata"], job_id=upload_id)
+    except QueueFull as e:
+        os.replace(file_path, session.part_path)
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    
+    upload_sessions.discard(session)
+    return JobStatus(job_id=job.job_id, status=job.status)
+
+@app.get("/api/jobs/{job_id}", response_model=ExtractionResult)
+async def get_job_result(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.done and job.status != "completed":
+        raise HTTPException(status_code=job_error_status(job), detail=job.error)
+    
+    return extraction_response(job)
+
+@app.post("/api/jobs/{job_id}/cancel", response_model=JobStatus)
+async def cancel_job(job_id: str):
+    """
+    Cancels a queued or running job. A running extraction stops at its next
+    page boundary; the uploaded file is removed either way.
+    """
+    job = job_manager.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    return JobStatus(job_id=job.job_id, status=job.status, total_voters=len(job.voters), error=job.error)
+
+@app.get("/api/jobs/{job_id}/profile")
+async def get_job_profile(job_id: str, format: str = "summary", x_admin_token: Optional[str] = Header(None)):
+    """
+    Profile artifacts of a job started with profile=true (admin only).
+    format: "summary" (top-N hot functions as JSON), "pstats" or "collapsed"
+    """
+    require_admin(x_admin_token)
+    
+    kinds = {"summary": "summary.json", "pstats": "pstats", "collapsed": "collapsed"}
+    if format not in kinds:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(kinds)}")
+    
+    path = profile_path(job_id, kinds[format])
+    if not os.path.exists(path):
+        job = job_manager.get(job_id)
+        if job is not None and job.profile and not job.done:
+            raise HTTPException(status_code=409, detail="Profile is not ready until the job finishes")
+        raise HTTPException(status_code=404, detail="No profile for this job")
+    
+    if format == "summary":
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    return FileResponse(path, media_type="application/octet-stream", filename=os.path.basename(path))
+
+def check_rollup_level(level: str):
+    if level not in ROLLUP_LEVELS:
+        raise HTTPException(status_code=400, detail=f"level must be one of: {', '.join(ROLLUP_LEVELS)}")
+
+@app.get("/api/jobs/{job_id}/aggregates")
+async def get_job_aggregates(job_id: str, level: str = "area"):
+    """
+    Per-area statistics of a job: voter count, implied gender split, age
+    brackets, occupation histogram and missing-field rates.
+    level: "area", "union", "upazila" or "district"
+    Maintained while the job runs, so this can be polled before it completes,
+    and kept after the job and its voters have been evicted.
+    """
+    check_rollup_level(level)
+    job = job_manager.get(job_id)
+    if job is None:
+        stored = job_manager.job_aggregates(job_id)
+        if stored is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return {"job_id": job_id, "status": "completed", "level": level, "areas": stored.rollup(level)}
+    if job.done and job.status != "completed":
+        raise HTTPException(status_code=job_error_status(job), detail=job.error)
+    
+    return {"job_id": job.job_id, "status": job.status, "level": level, "areas": job.aggregates.rollup(level)}
+
+@app.get("/api/aggregates")
+async def get_all_aggregates(level: str = "district"):
+    """
+    The same statistics rolled up across every job completed on this server.
+    """
+    check_rollup_level(level)
+    return {"level": level, "areas": job_manager.aggregates().rollup(level)}
+
+@app.get("/api/jobs/{job_id}/events")
+async def stream_job_events(job_id: str):
+    """
+    Server-Sent Events stream of per-page progress for a job.
+    Replays all events published so far, then follows until the job finishes.
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    async def event_stream():
+        sent = 0
+        while True:
+            # Snapshot the length before checking `done` so the final event is never missed
+            done = job.done
+            events = job.events
+            while sent < len(events):
+                yield f"event: progress\ndata: {json.dumps(events[sent], ensure_ascii=False)}\n\n"
+                sent += 1
+            if done:
+                yield f"event: done\ndata: {json.dumps({'status': job.status, 'error': job.error})}\n\n"
+                return
+            await asyncio.sleep(SSE_POLL_INTERVAL)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# Worker protocol for distributed extraction. Plain `def` endpoints: the
+# SQLite calls block, so FastAPI runs them in its thread pool.
+
+@app.post("/api/worker/lease", response_model=Optional[WorkerTask])
+def worker_lease(request: WorkerLeaseRequest, x_worker_token: Optional[str] = Header(None)):
+    """
+    Leases the next pending page-range task; 204 when there is no work.
+    """
+    require_worker(x_worker_token)
+    
+    task = get_task_queue().lease(request.worker_id, request.lease_seconds or LEASE_SECONDS)
+    if task is None:
+        return Response(status_code=204)
+    return task
+
+@app.post("/api/worker/tasks/{task_id}/heartbeat")
+def worker_heartbeat(task_id: str, request: TaskHeartbeat, x_worker_token: Optional[str] = Header(None)):
+    require_worker(x_worker_token)
+    
+    if not get_task_queue().heartbeat(task_id, request.lease_token, request.lease_seconds or LEASE_SECONDS):
+        raise HTTPException(status_code=409, detail="Lease lost")
+    return {"status": "ok"}
+
+@app.post("/api/worker/tasks/{task_id}/complete")
+def worker_complete(task_id: str, request: TaskCompletion, x_worker_token: Optional[str] = Header(None)):
+    require_worker(x_worker_token)
+    
+    voters = [voter.model_dump() for voter in request.voters]
+    if not get_task_queue().complete(task_id, request.lease_token, voters, request.aggregates):
+        raise HTTPException(status_code=409, detail="Lease lost")
+    return {"status": "ok"}
+
+@app.post("/api/worker/tasks/{task_id}/fail")
+def worker_fail(task_id: str, request: TaskFailure, x_worker_token: Optional[str] = Header(None)):
+    require_worker(x_worker_token)
+    
+    if not get_task_queue().fail(task_id, request.lease_token, request.error):
+        raise HTTPException(status_code=409, detail="Lease lost")
+    return {"status": "ok"}
+
+@app.get("/api/worker/tasks/{task_id}/file")
+def worker_task_file(task_id: str, lease_token: str, x_worker_token: Optional[str] = Header(None)):
+    """
+    The PDF of a leased task, for workers that do not share the server's disk.
+    """
+    require_worker(x_worker_token)
+    
+    task = get_task_queue().get_task(task_id, lease_token)
+    if task is None:
+        raise HTTPException(status_code=409, detail="Lease lost")
+    return FileResponse(task["pdf_path"], media_type="application/pdf")
 
 # Mount static files (Frontend) - Must be after API routes
 # We check if static directory exists (it will be present in distributed exe)
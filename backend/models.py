@@ -6,6 +6,7 @@ class Voter(BaseModel):
     name: Optional[str] = None
     voter_id: Optional[str] = None
     father_name: Optional[str] = None
+    relation: Optional[str] = None  # "father" (পিতা) or "husband" (স্বামী)
     mother_name: Optional[str] = None
     occupation: Optional[str] = None
     date_of_birth: Optional[str] = None
@@ -24,3 +25,70 @@ class ExtractionResult(BaseModel):
     status: str
     total_voters: int
     data: list[Voter]
+
+class JobStatus(BaseModel):
+    job_id: str
+    status: str
+    total_voters: int = 0
+    error: Optional[str] = None
+
+# Distributed worker protocol (see backend/worker.py)
+
+class WorkerLeaseRequest(BaseModel):
+    worker_id: str
+    lease_seconds: Optional[float] = None
+
+class WorkerTask(BaseModel):
+    task_id: str
+    job_id: str
+    task_index: int
+    page_start: int
+    page_end: int
+    metadata: dict
+    # Parsed header the first page continues, if it has none of its own
+    start_area: Optional[dict] = None
+    lease_token: str
+    lease_expires: float
+    attempts: int
+
+class TaskHeartbeat(BaseModel):
+    lease_token: str
+    lease_seconds: Optional[float] = None
+
+class TaskCompletion(BaseModel):
+    lease_token: str
+    voters: list[Voter]
+    # AreaAggregates.to_state() of the task's voters
+    aggregates: Optional[list] = None
+
+class TaskFailure(BaseModel):
+    lease_token: str
+    error: str
+
+# Chunked, resumable uploads (see backend/uploads.py)
+
+class UploadInit(BaseModel):
+    filename: str
+    size: int
+    sha256: str = ""
+    # Set to hash per chunk (X-Chunk-Sha256 on every PUT) instead of the whole file
+    chunk_size: Optional[int] = None
+    district: str = ""
+    upazila: str = ""
+    union: str = ""
+    ward_number: str = ""
+    voter_area: str = ""
+    voter_area_code: str = ""
+
+class UploadStatus(BaseModel):
+    upload_id: str
+    filename: str
+    total_size: int
+    received_bytes: int
+    next_offset: int
+    ranges: list[list[int]]
+    complete: bool
+    chunk_size: Optional[int] = None
+
+class UploadFinalize(BaseModel):
+    sha256: Optional[str] = None
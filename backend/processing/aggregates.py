@@ -0,0 +1,162 @@
+import re
+import threading
+from collections import Counter
+from datetime import date
+from typing import Dict, Iterable, Optional, Tuple
+
+from .records import VoterRecord
+
+# Area key, most to least general - a roll-up level keeps a prefix of it
+AREA_FIELDS = ("district", "upazila", "union", "ward_number", "voter_area", "voter_area_code")
+ROLLUP_LEVELS = {"district": 1, "upazila": 2, "union": 3, "area": len(AREA_FIELDS)}
+
+# Fields whose missing rate is reported. serial_no is left out: it is
+# inferred after extraction by fill_missing_serial_numbers.
+TRACKED_FIELDS = ("name", "voter_id", "father_name", "mother_name", "occupation", "date_of_birth", "address")
+
+# (label, minimum age, maximum age). Voters are 18+, so a younger age
+# means a misread date of birth and is counted as "unknown"
+AGE_BRACKETS = (
+    ("18-25", 18, 25),
+    ("26-35", 26, 35),
+    ("36-45", 36, 45),
+    ("46-55", 46, 55),
+    ("56-65", 56, 65),
+    ("66+", 66, 200),
+)
+
+DOB_PATTERN = re.compile(r'(\d{1,2})[/.\-](\d{1,2})[/.\-](\d{4})')
+
+def age_bracket(date_of_birth: Optional[str], today: date) -> str:
+    match = DOB_PATTERN.search(date_of_birth or "")
+    if not match:
+        return "unknown"
+    day, month, year = (int(part) for part in match.groups())
+    age = today.year - year - ((today.month, today.day) < (month, day))
+    for label, low, high in AGE_BRACKETS:
+        if low <= age <= high:
+            return label
+    return "unknown"
+
+class AreaStats:
+    """
+    Running counts for one area. Only counters - no voter rows are kept.
+    """
+    __slots__ = ("total", "relations", "age_brackets", "occupations", "missing")
+
+    def __init__(self):
+        self.total = 0
+        self.relations = Counter()
+        self.age_brackets = Counter()
+        self.occupations = Counter()
+        self.missing = Counter()
+
+    def add(self, voter: VoterRecord, today: date):
+        self.total += 1
+        self.relations[voter.relation or "missing"] += 1
+        self.age_brackets[age_bracket(voter.date_of_birth, today)] += 1
+        if voter.occupation:
+            self.occupations[voter.occupation] += 1
+        for field in TRACKED_FIELDS:
+            if not getattr(voter, field):
+                self.missing[field] += 1
+
+    def merge(self, other: "AreaStats"):
+        self.total += other.total
+        self.relations.update(other.relations)
+        self.age_brackets.update(other.age_brackets)
+        self.occupations.update(other.occupations)
+        self.missing.update(other.missing)
+
+    def to_dict(self) -> dict:
+        return {
+            "total_voters": self.total,
+            # স্বামী (husband) is only listed for married women; পিতা does not tell us the gender
+            "gender": {
+                "female": self.relations["husband"],
+                "unknown": self.total - self.relations["husband"],
+            },
+            "relations": dict(self.relations),
+            "age_brackets": {label: self.age_brackets[label] for label, _, _ in AGE_BRACKETS} | {"unknown": self.age_brackets["unknown"]},
+            "occupations": dict(self.occupations.most_common()),
+            "missing_rates": {
+                field: round(self.missing[field] / self.total, 4) if self.total else 0.0
+                for field in TRACKED_FIELDS
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "AreaStats":
+        stats = cls()
+        stats.total = data["total"]
+        stats.relations.update(data["relations"])
+        stats.age_brackets.update(data["age_brackets"])
+        stats.occupations.update(data["occupations"])
+        stats.missing.update(data["missing"])
+        return stats
+
+    def to_state(self) -> dict:
+        """
+        Raw counters, lossless (to_dict reports rates).
+        """
+        return {
+            "total": self.total,
+            "relations": dict(self.relations),
+            "age_brackets": dict(self.age_brackets),
+            "occupations": dict(self.occupations),
+            "missing": dict(self.missing),
+        }
+
+class AreaAggregates:
+    """
+    Per-area statistics maintained incrementally as extract_voters_from_pdf
+    emits voters. Roll-ups to union/upazila/district merge the per-area
+    counters, so they never touch voter rows. Safe to read while a worker
+    thread is still adding.
+    """
+
+    def __init__(self, today: Optional[date] = None):
+        self.today = today or date.today()
+        self.areas: Dict[Tuple, AreaStats] = {}
+        self._lock = threading.Lock()
+
+    def add(self, voter: VoterRecord):
+        key = tuple(getattr(voter, field) for field in AREA_FIELDS)
+        with self._lock:
+            stats = self.areas.get(key)
+            if stats is None:
+                stats = self.areas[key] = AreaStats()
+            stats.add(voter, self.today)
+
+    def merge(self, other: "AreaAggregates"):
+        with other._lock:
+            items = [(key, stats) for key, stats in other.areas.items()]
+        with self._lock:
+            for key, stats in items:
+                self.areas.setdefault(key, AreaStats()).merge(stats)
+
+    def rollup(self, level: str = "area") -> list:
+        """
+        level: "area", "union", "upazila" or "district"
+        """
+        depth = ROLLUP_LEVELS[level]
+        rolled: Dict[Tuple, AreaStats] = {}
+        with self._lock:
+            for key, stats in self.areas.items():
+                rolled.setdefault(key[:depth], AreaStats()).merge(stats)
+
+        return [
+            {**dict(zip(AREA_FIELDS, key)), **stats.to_dict()}
+            for key, stats in sorted(rolled.items(), key=lambda item: tuple(part or "" for part in item[0]))
+        ]
+
+    def to_state(self) -> list:
+        with self._lock:
+            return [{"area": list(key), "stats": stats.to_state()} for key, stats in self.areas.items()]
+
+    @classmethod
+    def from_state(cls, state: Iterable[dict]) -> "AreaAggregates":
+        aggregates = cls()
+        for entry in state:
+            aggregates.areas[tuple(entry["area"])] = AreaStats.from_dict(entry["stats"])
+        return aggregates
@@ -1,5 +1,8 @@
 import re
 
+CONSERVATIVE_FIRST_LETTERS = {'ঙ'}
+CONSERVATIVE_PAIRS = {('ক', 'ষ')}
+
 def fix_broken_conjuncts(text: str, field_type: str = "conservative") -> str:
     """
     Fix broken Bengali conjuncts that were separated during OCR/PDF extraction.
@@ -147,6 +150,18 @@ def fix_broken_conjuncts(text: str, field_type: str = "conservative") -> str:
         ('স', 'ত', 'র'): 'স্ত্র',
     }
     
+    if field_type == "conservative":
+        # Only pairs that cannot be two separate words: ঙ (almost) never ends a
+        # Bengali word and ক্ষ is unambiguous, so this keeps ঙ + ক/খ/গ/ঘ, ক + ষ and
+        # the three-letter স্ত্র. ণ and ষ are left out - they end common words
+        # (ঘোষ, শেষ, ব্রাহ্মণ) and place names are full of them. Used for free text
+        # such as addresses, where merging across a real word boundary would
+        # corrupt the value.
+        high_confidence_conjuncts = {
+            pair: conjunct for pair, conjunct in high_confidence_conjuncts.items()
+            if pair[0] in CONSERVATIVE_FIRST_LETTERS or pair in CONSERVATIVE_PAIRS
+        }
+    
     # Regex to find digits
     digit_pattern = re.compile(r'[০-৯0-9]')
     
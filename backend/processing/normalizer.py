@@ -186,6 +186,58 @@ def normalize_bengali_text(text: str) -> str:
 
     return text.strip()
 
+def clean_bengali_text(text: str) -> str:
+    """
+    Cheap cleaning applied to a whole cell before fields are located:
+    NFC, CID decoding and vowel-order fixes. Unlike normalize_bengali_text it
+    keeps line breaks and does no conjunct or dictionary fixing - those run
+    per field in normalize_field, only on the values that need them.
+    """
+    if not text:
+        return ""
+    
+    import unicodedata
+    text = unicodedata.normalize('NFC', text)
+    text = replace_cids(text)
+    text = reorder_bengali_vowels(text)
+    text = text.replace('\u09c7\u09be', '\u09cb')
+    
+    return text.strip()
+
+# How each voter field is normalized after it has been located:
+#   name    - aggressive conjunct fixing + dictionary correction
+#   address - conservative conjunct fixing only
+#   numeric - Bengali -> English numerals only (IDs, dates, serials)
+FIELD_PROFILES = {
+    "name": "name",
+    "father_name": "name",
+    "mother_name": "name",
+    "occupation": "address",
+    "address": "address",
+    "voter_id": "numeric",
+    "date_of_birth": "numeric",
+    "serial_no": "numeric",
+}
+
+def normalize_field(value: str, profile: str) -> str:
+    """
+    Applies a normalization profile (see FIELD_PROFILES) to a single, already
+    cleaned field value.
+    """
+    if not value:
+        return value
+    
+    if profile == "numeric":
+        return convert_bengali_to_english_numerals(value)
+    
+    from .conjunct_fixer import fix_broken_conjuncts
+    if profile == "name":
+        from .ocr_corrector import fix_ocr_corruptions
+        value = fix_broken_conjuncts(value, field_type="aggressive")
+        return fix_ocr_corruptions(value).strip()
+    
+    return fix_broken_conjuncts(value, field_type="conservative")
+
 def convert_bengali_to_english_numerals(text: str) -> str:
     """
     Converts Bengali numerals (০-৯) to English numerals (0-9).
@@ -1,10 +1,27 @@
 import pdfplumber
 import re
-from typing import List
-from ..models import Voter
-from .normalizer import normalize_bengali_text, convert_bengali_to_english_numerals
+from typing import List, Optional
+from .records import VoterRecord
+from .normalizer import clean_bengali_text, normalize_field, FIELD_PROFILES, convert_bengali_to_english_numerals
+from .aggregates import AreaAggregates
+from .progress import ProgressTracker, ProgressCallback, Checkpoint
 
-def parse_voter_cell(text: str) -> Voter:
+# Fraction of the page height (from the top) that holds the area header
+HEADER_BAND_RATIO = 0.2
+
+METADATA_FIELDS = ("district", "upazila", "union", "ward_number", "voter_area", "voter_area_code")
+
+# Grid extraction settings (equivalent to page.extract_tables, but find_tables
+# keeps the table positions so the header band can stop above them)
+TABLE_SETTINGS = {
+    "vertical_strategy": "lines",
+    "horizontal_strategy": "lines",
+    "intersection_y_tolerance": 5
+}
+
+RELATION_LABELS = {"পিতা": "father", "Father": "father", "স্বামী": "husband", "Husband": "husband"}
+
+def parse_voter_cell(text: str) -> VoterRecord:
     """
     Parses a single cell text to extract voter details.
     Expected format in cell involves Bengali labels.
@@ -12,7 +29,7 @@ def parse_voter_cell(text: str) -> Voter:
     lines = [line.strip() for line in text.split('\n') if line.strip()]
     
     # Defaults
-    voter = Voter()
+    voter = VoterRecord()
     
     # Regex Patterns for specific fields
     # Note: These are heuristic patterns based on common layouts
@@ -20,8 +37,9 @@ def parse_voter_cell(text: str) -> Voter:
     # Serial No often at the top or separate
     # Trying to find patterns like "নাম: ...", "পিতা: ..."
     
-    # Normalize text first (remove zero-width spaces etc)
-    text = normalize_bengali_text(text)
+    # Cheap cleaning only (NFC, CIDs, vowel order). The expensive conjunct and
+    # dictionary fixes run per field below, on the located values that need them.
+    text = clean_bengali_text(text)
     
     # Name
     # Matches: নাম, নামঃ, নাম:, Nam
@@ -33,46 +51,49 @@ def parse_voter_cell(text: str) -> Voter:
     # 4. Newline or End of String
     name_match = re.search(r'(?:নাম|ভোটার|Name)\s*[:\-\s]\s*(.+?)(?=\s*(?:পিতা|স্বামী|Father|Husband|মাতা|Mother|ID|NID|NO|No|ভোটার\s*নং|ভোটার্নং|[০-৯0-9]{10,}|\n|$))', text)
     if name_match:
-        voter.name = name_match.group(1).strip()
+        voter.name = normalize_field(name_match.group(1).strip(), FIELD_PROFILES["name"])
     
     # Father / Husband
     # Matches: পিতা, স্বামী, Father, Husband
     # Stop at 'মাতা', 'Address', 'DOB', 'Occupation', 'ID', digits, or newline
-    father_match = re.search(r'(?:পিতা|স্বামী|Father|Husband)\s*[:\-\s]\s*(.+?)(?=\s*(?:মাতা|Mother|জন্ম|Date|DOB|পেশা|Occupation|ঠিকানা|Address|ID|NID|[০-৯0-9]{10,}|\n|$))', text)
+    father_match = re.search(r'(পিতা|স্বামী|Father|Husband)\s*[:\-\s]\s*(.+?)(?=\s*(?:মাতা|Mother|জন্ম|Date|DOB|পেশা|Occupation|ঠিকানা|Address|ID|NID|[০-৯0-9]{10,}|\n|$))', text)
     if father_match:
-        voter.father_name = father_match.group(1).strip()
+        voter.relation = RELATION_LABELS[father_match.group(1)]
+        voter.father_name = normalize_field(father_match.group(2).strip(), FIELD_PROFILES["father_name"])
         
     # Mother
     # Matches: মাতা, Mother
     # Stop at 'Address', 'DOB', 'Occupation', 'ID', digits, or newline
     mother_match = re.search(r'(?:মাতা|Mother)\s*[:\-\s]\s*(.+?)(?=\s*(?:জন্ম|Date|DOB|পেশা|Occupation|ঠিকানা|Address|ID|NID|[০-৯0-9]{10,}|\n|$))', text)
     if mother_match:
-        voter.mother_name = mother_match.group(1).strip()
+        voter.mother_name = normalize_field(mother_match.group(1).strip(), FIELD_PROFILES["mother_name"])
     
     # DOB (জন্ম তারিখ) - EXTRACT THIS FIRST before occupation
     # Matches: জন্ম তারিখ, Date of Birth. Improved to handle years like 19xx or 20xx
     # Handling potential newline after label
     dob_match = re.search(r'(?:জন্ম তারিখ|জন্ম|Date of Birth|DOB)\s*[:\-\s]*\s*([০-৯0-9\/.-]+)', text)
     if dob_match:
-        voter.date_of_birth = convert_bengali_to_english_numerals(dob_match.group(1).strip())
+        voter.date_of_birth = normalize_field(dob_match.group(1).strip(), FIELD_PROFILES["date_of_birth"])
         
     # Occupation (পেশা) - Extract AFTER DOB to avoid capturing DOB content
     # Stop at comma followed by জ (জন্ম) or at newline
     # Using negative lookahead or just stopping before comma
     occ_match = re.search(r'(?:পেশা|Occupation)\s*[:\-\s]\s*([^,\n]+)', text)
     if occ_match:
-        voter.occupation = occ_match.group(1).strip()
+        voter.occupation = normalize_field(occ_match.group(1).strip(), FIELD_PROFILES["occupation"])
         
     # ID (NID or Voter No) - strict digit capture
     # Prioritizes 17, 13, or 10 digit NIDs
     id_match = re.search(r'(?:ID|NID|NO|No)?\s*[:\-\s]*([০-৯0-9]{10,17})', text)
     if id_match:
-        voter.voter_id = convert_bengali_to_english_numerals(id_match.group(1))
+        voter.voter_id = normalize_field(id_match.group(1), FIELD_PROFILES["voter_id"])
     
     # Address (ঠিকানা) - often the last few lines if not labeled
-    addr_match = re.search(r'ঠিকানা\s*[:\-\s]\s*(.+)', text)
+    # It is the last field of the cell, so it runs to the end - wrapped lines included
+    addr_match = re.search(r'ঠিকানা\s*[:\-\s]\s*(.+)', text, re.DOTALL)
     if addr_match:
-        voter.address = addr_match.group(1).strip()
+        address = " ".join(line.strip() for line in addr_match.group(1).splitlines() if line.strip())
+        voter.address = normalize_field(address, FIELD_PROFILES["address"])
     
     return voter
 
@@ -93,8 +114,9 @@ def parse_area_metadata(header_text: str) -> dict:
     if not header_text:
         return metadata
     
-    # Normalize the header text
-    header_text = normalize_bengali_text(header_text)
+    # Cheap cleaning keeps the line breaks the patterns below rely on;
+    # place names get the conservative "address" profile once located
+    header_text = clean_bengali_text(header_text)
     
     # District (জেলা)
     # Stop before উপজেলা/থানা keywords
@@ -131,24 +153,136 @@ def parse_area_metadata(header_text: str) -> dict:
     if code_match:
         metadata["voter_area_code"] = code_match.group(1).strip()
     
+    for field in ("district", "upazila", "union", "voter_area"):
+        if metadata[field]:
+            metadata[field] = normalize_field(metadata[field], "address")
+    
     return metadata
 
-def extract_voters_from_pdf(pdf_path: str, metadata: dict) -> List[Voter]:
+def extract_header_text(page, tables) -> str:
+    """
+    Extracts text from the header band of a page only: the top of the page down
+    to the first voter table (at most HEADER_BAND_RATIO of the height).
+    Much cheaper than page.extract_text() because pdfplumber only has to lay out
+    the characters inside the cropped box.
+    """
+    # The page box need not start at (0, 0) - offset MediaBox/CropBox
+    x0, top, x1, _ = page.bbox
+    bottom = top + page.height * HEADER_BAND_RATIO
+    if tables:
+        bottom = min(bottom, min(table.bbox[1] for table in tables))
+    if bottom <= top:
+        return ""
+    
+    # Header parsing is best effort - never let it fail the extraction
+    try:
+        header = page.crop((x0, top, x1, bottom))
+        return header.extract_text() or ""
+    except ValueError as e:
+        print(f"[WARNING] Could not read the header band of page {page.page_number}: {e}")
+        return ""
+
+def area_fully_supplied(user_metadata: dict) -> bool:
+    """
+    True when the user supplied every area field, so parsed headers cannot change anything.
+    """
+    return all(user_metadata.get(field) not in (None, "", "Unavailable") for field in METADATA_FIELDS)
+
+def find_start_areas(pdf, start_pages: List[int]) -> List[dict]:
+    """
+    For each start page (ascending), the parsed area metadata of the nearest
+    page before it with a recognisable header ({} if none) - the area a page
+    range starting there continues. Each page is read at most once: the scan
+    back from one start stops at the previous start and reuses its answer.
+    """
+    areas = []
+    area = {}
+    previous_start = 0
+    for start in start_pages:
+        for page_num in range(start - 1, previous_start - 1, -1):
+            page = pdf.pages[page_num]
+            parsed = parse_area_metadata(extract_header_text(page, page.find_tables(TABLE_SETTINGS)))
+            if any(parsed.values()):
+                area = parsed
+                break
+        areas.append(area)
+        previous_start = start
+    return areas
+
+def merge_area_metadata(parsed: dict, user_metadata: dict) -> dict:
+    """
+    Combines metadata parsed from the page header with user-supplied values.
+    User-supplied values win; "Unavailable" or empty user values count as not supplied.
+    """
+    merged = {}
+    for field in METADATA_FIELDS:
+        user_value = user_metadata.get(field)
+        if user_value and user_value != "Unavailable":
+            merged[field] = user_value
+        elif parsed.get(field):
+            value = parsed[field]
+            if field in ("ward_number", "voter_area_code"):
+                value = convert_bengali_to_english_numerals(value)
+            merged[field] = value
+        else:
+            merged[field] = "Unavailable"
+    return merged
+
+def extract_voters_from_pdf(
+    pdf_path: str,
+    metadata: dict,
+    progress: Optional[ProgressCallback] = None,
+    checkpoint: Optional[Checkpoint] = None,
+    pages: Optional[range] = None,
+    fill_serials: bool = True,
+    aggregates: Optional[AreaAggregates] = None,
+    start_area: Optional[dict] = None
+) -> List[VoterRecord]:
+    """
+    pages: zero-based page numbers to process (default: all pages)
+    start_area: parsed header of the area the first page continues, when
+                `pages` starts mid-document (see find_start_areas)
+    aggregates: updated with every voter as it is emitted, so per-area
+                statistics are available while the job runs
+    fill_serials: run fill_missing_serial_numbers at the end. Distributed tasks
+                  turn this off; the coordinator fills serials once over the
+                  concatenated results so inference works across task boundaries.
+    """
     voters = []
+    tracker = ProgressTracker(progress, checkpoint)
+    tracker.stage("opening")
+
+    # Header parsing is cached: consecutive pages of the same area share identical
+    # header text, so parse_area_metadata only runs when the header changes
+    cached_header_text = None
+    last_parsed = start_area or {}
+    page_metadata = merge_area_metadata(last_parsed, metadata)
 
     with pdfplumber.open(pdf_path) as pdf:
-        for page_num, page in enumerate(pdf.pages):
-            # Skip metadata extraction - use provided metadata directly
-            
+        page_numbers = pages if pages is not None else range(len(pdf.pages))
+        tracker.start(len(page_numbers))
+
+        for page_num in page_numbers:
+            tracker.check()
+            page = pdf.pages[page_num]
+
             # Grid Extraction
-            tables = page.extract_tables({
-                "vertical_strategy": "lines", 
-                "horizontal_strategy": "lines",
-                "intersection_y_tolerance": 5
-            })
+            found_tables = page.find_tables(TABLE_SETTINGS)
+            tables = [table.extract() for table in found_tables]
+
+            # Area metadata from the header band of this page
+            header_text = extract_header_text(page, found_tables)
+            if header_text != cached_header_text:
+                cached_header_text = header_text
+                parsed = parse_area_metadata(header_text)
+                # A page without a recognisable header continues the previous area
+                if any(parsed.values()):
+                    last_parsed = parsed
+                page_metadata = merge_area_metadata(last_parsed, metadata)
             
             # Flatten table rows
             for table in tables:
+                tracker.check()
                 for row in table:
                     # 'row' is a list of cells
                     if not row:
@@ -168,13 +302,13 @@ def extract_voters_from_pdf(pdf_path: str, metadata: dict) -> List[Voter]:
                         # Parse
                         voter_obj = parse_voter_cell(cell_text)
                         
-                        # Fill Metadata from user input
-                        voter_obj.district = metadata["district"]
-                        voter_obj.upazila = metadata["upazila"]
-                        voter_obj.union = metadata["union"]
-                        voter_obj.ward_number = metadata["ward_number"]
-                        voter_obj.voter_area = metadata["voter_area"]
-                        voter_obj.voter_area_code = metadata["voter_area_code"]
+                        # Fill Metadata from the page header / user input
+                        voter_obj.district = page_metadata["district"]
+                        voter_obj.upazila = page_metadata["upazila"]
+                        voter_obj.union = page_metadata["union"]
+                        voter_obj.ward_number = page_metadata["ward_number"]
+                        voter_obj.voter_area = page_metadata["voter_area"]
+                        voter_obj.voter_area_code = page_metadata["voter_area_code"]
                         
                         # Try to extract Serial No from cell text (often top left)
                         serial_match = re.search(r'^([০-৯0-9]+)', cell_text)
@@ -184,13 +318,20 @@ def extract_voters_from_pdf(pdf_path: str, metadata: dict) -> List[Voter]:
                         # Only add if we got at least a name
                         if voter_obj.name:
                             voters.append(voter_obj)
+                            if aggregates is not None:
+                                aggregates.add(voter_obj)
+
+            tracker.page_done(len(voters))
     
     # Post-processing: Fill in missing serial numbers
-    voters = fill_missing_serial_numbers(voters)
+    tracker.stage("post_processing")
+    if fill_serials:
+        voters = fill_missing_serial_numbers(voters)
 
+    tracker.stage("completed")
     return voters
 
-def fill_missing_serial_numbers(voters: List[Voter]) -> List[Voter]:
+def fill_missing_serial_numbers(voters: List[VoterRecord]) -> List[VoterRecord]:
     """
     Fills in missing serial numbers by inferring from previous and next voters.
     """
@@ -214,10 +355,21 @@ def fill_missing_serial_numbers(voters: List[Voter]) -> List[Voter]:
     
     return voters
 
-def process_pdf(pdf_path: str, metadata: dict = None) -> List[Voter]:
+def process_pdf(
+    pdf_path: str,
+    metadata: dict = None,
+    progress: Optional[ProgressCallback] = None,
+    checkpoint: Optional[Checkpoint] = None,
+    aggregates: Optional[AreaAggregates] = None
+) -> List[VoterRecord]:
     """
     Main entry point for processing a PDF.
-    metadata: dict with keys: district, upazila, union, ward_number, voter_area, voter_area_code
+    metadata: dict with keys: district, upazila, union, ward_number, voter_area, voter_area_code.
+              Values override what is parsed from each page header; leave a key
+              empty or "Unavailable" to use the parsed value.
+    progress: optional callback receiving per-page progress event dicts
+    checkpoint: optional callable invoked between pages; raise ExtractionCancelled from it to stop
+    aggregates: optional AreaAggregates maintained as voters are extracted
     """
     if metadata is None:
         metadata = {
@@ -229,4 +381,4 @@ def process_pdf(pdf_path: str, metadata: dict = None) -> List[Voter]:
             "voter_area_code": "Unavailable"
         }
     
-    return extract_voters_from_pdf(pdf_path, metadata)
+    return extract_voters_from_pdf(pdf_path, metadata, progress, checkpoint, aggregates=aggregates)
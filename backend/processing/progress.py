@@ -0,0 +1,79 @@
+import time
+from typing import Callable, Optional
+
+ProgressCallback = Callable[[dict], None]
+
+# Called between units of work; raises ExtractionCancelled to stop the extraction
+Checkpoint = Callable[[], None]
+
+class ExtractionCancelled(Exception):
+    """Raised from a checkpoint when the job running the extraction was cancelled."""
+
+class ExtractionTimeout(ExtractionCancelled):
+    """Raised from a checkpoint when the job ran past its deadline."""
+
+class ProgressTracker:
+    """
+    Turns page-level milestones of the extraction loop into progress events.
+    The callback is expected to be cheap and non-blocking (e.g. append to a list);
+    the tracker itself only does a few arithmetic operations per page.
+    """
+
+    def __init__(self, callback: Optional[ProgressCallback] = None, checkpoint: Optional[Checkpoint] = None):
+        self.callback = callback
+        self.checkpoint = checkpoint
+        self.total_pages = 0
+        self.pages_done = 0
+        self.voters = 0
+        self.started_at = time.monotonic()
+
+    def stage(self, stage: str, **extra):
+        self._emit(stage, **extra)
+
+    def start(self, total_pages: int):
+        self.total_pages = total_pages
+        self.started_at = time.monotonic()
+        self._emit("extracting")
+
+    def check(self):
+        """
+        Gives the owner of the extraction a chance to stop it.
+        Called between pages and tables, never inside pdfplumber.
+        """
+        if self.checkpoint is not None:
+            self.checkpoint()
+
+    def page_done(self, voters: int, pages: int = 1):
+        """
+        Called once a page (or, for distributed jobs, a batch of pages) has been fully parsed.
+        voters is the running total so far.
+        """
+        self.pages_done += pages
+        self.voters = voters
+        self._emit("extracting")
+
+    def _emit(self, stage: str, **extra):
+        if self.callback is None:
+            return
+
+        elapsed = time.monotonic() - self.started_at
+        pages_per_sec = self.pages_done / elapsed if elapsed > 0 and self.pages_done else 0.0
+        remaining = self.total_pages - self.pages_done
+        eta = remaining / pages_per_sec if pages_per_sec > 0 else None
+
+        event = {
+            "stage": stage,
+            "page": self.pages_done,
+            "total_pages": self.total_pages,
+            "voters": self.voters,
+            "elapsed_seconds": round(elapsed, 2),
+            "pages_per_sec": round(pages_per_sec, 3),
+            "eta_seconds": round(eta, 1) if eta is not None else None,
+        }
+        event.update(extra)
+
+        try:
+            self.callback(event)
+        except Exception as e:
+            # Progress reporting must never break an extraction
+            print(f"[WARNING] Progress callback failed: {e}")
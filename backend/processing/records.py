@@ -0,0 +1,41 @@
+from dataclasses import dataclass, fields
+from typing import Optional
+
+@dataclass(slots=True)
+class VoterRecord:
+    """
+    Internal voter representation used throughout the processing package.
+    Mirrors models.Voter field for field, but is a plain slotted dataclass:
+    no validation and no per-attribute pydantic overhead while parsing.
+    Converted to the pydantic model once, at the API boundary.
+    """
+    serial_no: Optional[str] = None
+    name: Optional[str] = None
+    voter_id: Optional[str] = None
+    father_name: Optional[str] = None
+    # Which label father_name was listed under: "father" (পিতা) or "husband" (স্বামী)
+    relation: Optional[str] = None
+    mother_name: Optional[str] = None
+    occupation: Optional[str] = None
+    date_of_birth: Optional[str] = None
+    address: Optional[str] = None
+
+    # Area Metadata (repeated for each voter as per request)
+    district: Optional[str] = None
+    upazila: Optional[str] = None
+    union: Optional[str] = None
+    ward_number: Optional[str] = None
+    voter_area: Optional[str] = None
+    voter_area_code: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        # Cheaper than dataclasses.asdict, which deep-copies every value
+        return {name: getattr(self, name) for name in VOTER_FIELDS}
+
+VOTER_FIELDS = tuple(f.name for f in fields(VoterRecord))
+
+def records_to_dicts(records) -> list:
+    """
+    Plain dicts ready to be validated once by the response model (see main.py).
+    """
+    return [record.to_dict() for record in records]
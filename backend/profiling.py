@@ -0,0 +1,198 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from typing import List, Optional
+
+PROFILE_DIR = os.path.join(os.path.abspath("."), "uploads", "profiles")
+SAMPLE_INTERVAL = float(os.environ.get("VOTER_PROFILE_SAMPLE_INTERVAL", "0.005"))
+TOP_N = 25
+
+# cProfile is per-interpreter on Python 3.12+ (sys.monitoring): a second
+# profiler cannot be enabled while one is active, and it would see every
+# thread anyway. Only one job is profiled at a time.
+_profile_lock = threading.Lock()
+
+# Functions we always want to see in the summary, even if they are not in the top N
+WATCHED_FUNCTIONS = (
+    "find_tables",
+    "extract_header_text",
+    "parse_area_metadata",
+    "parse_voter_cell",
+    "clean_bengali_text",
+    "normalize_field",
+    "fix_broken_conjuncts",
+    "fix_ocr_corruptions",
+    "get_close_matches",
+)
+
+def profile_path(job_id: str, kind: str) -> str:
+    """
+    kind: "pstats", "collapsed" or "summary.json"
+    """
+    return os.path.join(PROFILE_DIR, f"{job_id}.{kind}")
+
+def purge_profiles(cutoff: float):
+    """
+    Deletes profile artifacts last written before `cutoff` (a time.time() value).
+    """
+    try:
+        names = os.listdir(PROFILE_DIR)
+    except FileNotFoundError:
+        return
+    for name in names:
+        path = os.path.join(PROFILE_DIR, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"[WARNING] Failed to remove profile {path}: {e}")
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+class StackSampler(threading.Thread):
+    """
+    Periodically samples the stack of one thread and counts collapsed stacks
+    ("root;caller;callee" lines, the input format of flamegraph.pl / speedscope).
+    """
+
+    def __init__(self, target_thread_id: int, interval: float = SAMPLE_INTERVAL):
+        super().__init__(name=f"stack-sampler-{target_thread_id}", daemon=True)
+        self.target_thread_id = target_thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.target_thread_id)
+            if frame is None:
+                continue
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            self.stacks[";".join(reversed(labels))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+class JobProfiler:
+    """
+    Runs the enclosed block under cProfile plus a stack sampler and stores the
+    artifacts for a job:
+      <job_id>.pstats        - cProfile dump, load with pstats / snakeviz
+      <job_id>.collapsed     - sampled collapsed stacks, feed to flamegraph.pl
+      <job_id>.summary.json  - top-N hot functions and the watched functions
+
+    Must be entered on the thread that does the work. Profiling is best
+    effort: if another job is being profiled, or the profiler cannot be
+    enabled, the block runs unprofiled and `summary` says why.
+    """
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self.summary: Optional[dict] = None
+        self._profiler = cProfile.Profile()
+        self._sampler = StackSampler(threading.get_ident())
+        self._started_at = 0.0
+        self._active = False
+
+    def __enter__(self):
+        if not _profile_lock.acquire(blocking=False):
+            self._skip("Another job was being profiled")
+            return self
+
+        try:
+            self._profiler.enable()
+        except Exception as e:
+            _profile_lock.release()
+            self._skip(f"Profiler could not be enabled: {e}")
+            return self
+
+        self._active = True
+        self._started_at = time.monotonic()
+        self._sampler.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if not self._active:
+            return False
+
+        self._profiler.disable()
+        self._sampler.stop()
+        _profile_lock.release()
+        try:
+            self.save(time.monotonic() - self._started_at)
+        except Exception as e:
+            print(f"[WARNING] Failed to save profile for job {self.job_id}: {e}")
+        return False
+
+    def _skip(self, reason: str):
+        print(f"[WARNING] Job {self.job_id} runs without profiling: {reason}")
+        self.summary = {"skipped": reason}
+        try:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            with open(profile_path(self.job_id, "summary.json"), "w", encoding="utf-8") as f:
+                json.dump(self.summary, f, ensure_ascii=False, indent=2)
+        except OSError as e:
+            print(f"[WARNING] Failed to save profile for job {self.job_id}: {e}")
+
+    def save(self, wall_seconds: float):
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+
+        self._profiler.dump_stats(profile_path(self.job_id, "pstats"))
+        with open(profile_path(self.job_id, "collapsed"), "w", encoding="utf-8") as f:
+            f.write(self._sampler.collapsed())
+
+        self.summary = summarize(pstats.Stats(self._profiler, stream=io.StringIO()))
+        self.summary["wall_seconds"] = round(wall_seconds, 3)
+        self.summary["samples"] = sum(self._sampler.stacks.values())
+        with open(profile_path(self.job_id, "summary.json"), "w", encoding="utf-8") as f:
+            json.dump(self.summary, f, ensure_ascii=False, indent=2)
+
+def _function_row(func, stat) -> dict:
+    filename, line, name = func
+    calls, primitive_calls, total_time, cumulative_time, _ = stat
+    return {
+        "function": name,
+        "file": os.path.basename(filename),
+        "line": line,
+        "calls": calls,
+        "total_time": round(total_time, 4),
+        "cumulative_time": round(cumulative_time, 4),
+    }
+
+def summarize(stats: pstats.Stats, top_n: int = TOP_N) -> dict:
+    """
+    Builds the hot-function summary from cProfile stats.
+    """
+    rows: List[dict] = [_function_row(func, stat) for func, stat in stats.stats.items()]
+
+    watched = {}
+    for row in rows:
+        if row["function"] in WATCHED_FUNCTIONS:
+            # The same name can exist in several files - keep the busiest one
+            current = watched.get(row["function"])
+            if current is None or row["cumulative_time"] > current["cumulative_time"]:
+                watched[row["function"]] = row
+
+    return {
+        "total_time": round(stats.total_tt, 4),
+        "top_cumulative": sorted(rows, key=lambda r: r["cumulative_time"], reverse=True)[:top_n],
+        "top_self": sorted(rows, key=lambda r: r["total_time"], reverse=True)[:top_n],
+        "watched": [watched[name] for name in WATCHED_FUNCTIONS if name in watched],
+    }
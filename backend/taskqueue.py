@@ -0,0 +1,416 @@
+import json
+import os
+import sqlite3
+import time
+import uuid
+from typing import List, Optional
+
+import pdfplumber
+
+from .processing.aggregates import AreaAggregates
+from .processing.pdf_engine import fill_missing_serial_numbers, find_start_areas, area_fully_supplied
+from .processing.progress import ProgressTracker, ProgressCallback, Checkpoint
+from .processing.records import VoterRecord
+
+# Distributed extraction is off unless a queue database is configured
+QUEUE_DB = os.environ.get("VOTER_QUEUE_DB")
+PAGES_PER_TASK = int(os.environ.get("VOTER_PAGES_PER_TASK", "10"))
+LEASE_SECONDS = float(os.environ.get("VOTER_LEASE_SECONDS", "60"))
+# A task whose lease expired this many times is considered poisonous and fails the job
+MAX_ATTEMPTS = int(os.environ.get("VOTER_TASK_MAX_ATTEMPTS", "3"))
+COORDINATOR_POLL_INTERVAL = 1.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    task_id TEXT PRIMARY KEY,
+    job_id TEXT NOT NULL,
+    task_index INTEGER NOT NULL,
+    pdf_path TEXT NOT NULL,
+    page_start INTEGER NOT NULL,
+    page_end INTEGER NOT NULL,
+    metadata TEXT NOT NULL,
+    start_area TEXT,
+    status TEXT NOT NULL DEFAULT 'pending',
+    worker_id TEXT,
+    lease_token TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    voter_count INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    aggregates TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, created_at, task_index);
+CREATE INDEX IF NOT EXISTS tasks_job ON tasks (job_id, task_index);
+"""
+
+TASK_COLUMNS = "task_id, job_id, task_index, pdf_path, page_start, page_end, metadata, start_area, lease_token, lease_expires, attempts"
+
+def task_ranges(page_count: int, pages_per_task: int = PAGES_PER_TASK) -> List[range]:
+    """
+    Page ranges of a job's tasks. pages_per_task <= 0 makes one task per file.
+    """
+    if pages_per_task <= 0:
+        pages_per_task = max(page_count, 1)
+    return [
+        range(page_start, min(page_start + pages_per_task, page_count))
+        for page_start in range(0, max(page_count, 1), pages_per_task)
+    ]
+
+class SQLiteTaskQueue:
+    """
+    Shared queue of page-range extraction tasks backed by a single SQLite file.
+
+    Task life cycle: pending -> leased -> done | failed (| cancelled).
+    A worker leases a task for LEASE_SECONDS and must heartbeat to keep it;
+    a lease that runs out (dead or stuck worker) is handed to the next worker
+    that asks. Every lease gets a fresh token, so a worker that lost its lease
+    can no longer heartbeat, complete or fail the task.
+
+    Results are stored per task and read back ordered by task_index, i.e. in
+    page order, whatever order the workers finished in.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            # Queue files created before these columns existed
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(tasks)")}
+            for column in ("aggregates", "start_area"):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE tasks ADD COLUMN {column} TEXT")
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        # One short-lived connection per call keeps this safe to use from any thread
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def enqueue_job(
+        self,
+        job_id: str,
+        pdf_path: str,
+        page_count: int,
+        metadata: dict,
+        pages_per_task: int = PAGES_PER_TASK,
+        start_areas: Optional[List[dict]] = None
+    ) -> int:
+        """
+        Splits a PDF into the page-range tasks of task_ranges().
+        start_areas: per task, the parsed header its first page continues (see find_start_areas)
+        Returns the number of tasks.
+        """
+        now = time.time()
+        rows = []
+        for task_index, pages in enumerate(task_ranges(page_count, pages_per_task)):
+            start_area = start_areas[task_index] if start_areas else None
+            rows.append((
+                str(uuid.uuid4()), job_id, task_index, pdf_path, pages.start, pages.stop,
+                json.dumps(metadata, ensure_ascii=False),
+                json.dumps(start_area, ensure_ascii=False) if start_area else None,
+                now, now
+            ))
+
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(
+                "INSERT INTO tasks (task_id, job_id, task_index, pdf_path, page_start, page_end, metadata, start_area, "
+                "created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return len(rows)
+
+    def _requeue_expired(self, conn: sqlite3.Connection, now: float):
+        conn.execute(
+            "UPDATE tasks SET status = 'failed', error = 'Task lease expired too many times', updated_at = ? "
+            "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+            (now, now, MAX_ATTEMPTS)
+        )
+        conn.execute(
+            "UPDATE tasks SET status = 'pending', worker_id = NULL, lease_token = NULL, lease_expires = NULL, updated_at = ? "
+            "WHERE status = 'leased' AND lease_expires < ?",
+            (now, now)
+        )
+
+    def requeue_expired(self):
+        """
+        Returns tasks of dead workers to the queue. lease() does this too,
+        so calling it is only needed when no worker is asking for work.
+        """
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            self._requeue_expired(conn, time.time())
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def lease(self, worker_id: str, lease_seconds: float = LEASE_SECONDS) -> Optional[dict]:
+        """
+        Hands the oldest pending task to worker_id, or returns None when idle.
+        """
+        now = time.time()
+        conn = self._connect()
+        try:
+            # IMMEDIATE takes the write lock up front so two workers never lease the same task
+            conn.execute("BEGIN IMMEDIATE")
+            self._requeue_expired(conn, now)
+            row = conn.execute(
+                "SELECT task_id FROM tasks WHERE status = 'pending' ORDER BY created_at, task_index LIMIT 1"
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+
+            lease_token = uuid.uuid4().hex
+            conn.execute(
+                "UPDATE tasks SET status = 'leased', worker_id = ?, lease_token = ?, lease_expires = ?, "
+                "attempts = attempts + 1, updated_at = ? WHERE task_id = ?",
+                (worker_id, lease_token, now + lease_seconds, now, row["task_id"])
+            )
+            task = conn.execute(f"SELECT {TASK_COLUMNS} FROM tasks WHERE task_id = ?", (row["task_id"],)).fetchone()
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+        task = dict(task)
+        task["metadata"] = json.loads(task["metadata"])
+        task["start_area"] = json.loads(task["start_area"]) if task["start_area"] else None
+        return task
+
+    def _update_leased(self, task_id: str, lease_token: str, assignments: str, params: tuple) -> bool:
+        conn = self._connect()
+        try:
+            cursor = conn.execute(
+                f"UPDATE tasks SET {assignments}, updated_at = ? "
+                "WHERE task_id = ? AND lease_token = ? AND status = 'leased'",
+                params + (time.time(), task_id, lease_token)
+            )
+            return cursor.rowcount == 1
+        finally:
+            conn.close()
+
+    def heartbeat(self, task_id: str, lease_token: str, lease_seconds: float = LEASE_SECONDS) -> bool:
+        """
+        Extends a lease. False means the lease is gone (expired and re-leased, or
+        the job was cancelled) and the worker should abandon the task.
+        """
+        return self._update_leased(task_id, lease_token, "lease_expires = ?", (time.time() + lease_seconds,))
+
+    def complete(self, task_id: str, lease_token: str, voters: List[dict], aggregates: Optional[list] = None) -> bool:
+        """
+        aggregates: AreaAggregates.to_state() of the task's voters, merged by the coordinator
+        """
+        return self._update_leased(
+            task_id, lease_token,
+            "status = 'done', result = ?, aggregates = ?, voter_count = ?, lease_expires = NULL",
+            (
+                json.dumps(voters, ensure_ascii=False),
+                json.dumps(aggregates, ensure_ascii=False) if aggregates is not None else None,
+                len(voters)
+            )
+        )
+
+    def fail(self, task_id: str, lease_token: str, error: str) -> bool:
+        """
+        Reports a task error. The task is retried until it has used MAX_ATTEMPTS leases.
+        """
+        return self._update_leased(
+            task_id, lease_token,
+            "status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+            "error = ?, worker_id = NULL, lease_token = NULL, lease_expires = NULL",
+            (MAX_ATTEMPTS, error)
+        )
+
+    def job_progress(self, job_id: str) -> dict:
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT status, COUNT(*) AS tasks, SUM(page_end - page_start) AS pages, SUM(voter_count) AS voters, "
+                "MAX(error) AS error FROM tasks WHERE job_id = ? GROUP BY status",
+                (job_id,)
+            ).fetchall()
+        finally:
+            conn.close()
+
+        progress = {"tasks": 0, "done_tasks": 0, "done_pages": 0, "voters": 0, "failed": 0, "error": None}
+        for row in rows:
+            progress["tasks"] += row["tasks"]
+            if row["status"] == "done":
+                progress["done_tasks"] = row["tasks"]
+                progress["done_pages"] = row["pages"] or 0
+                progress["voters"] = row["voters"] or 0
+            elif row["status"] == "failed":
+                progress["failed"] = row["tasks"]
+                progress["error"] = row["error"]
+        return progress
+
+    def job_results(self, job_id: str) -> List[dict]:
+        """
+        All voters of a finished job, concatenated in page order.
+        """
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT result FROM tasks WHERE job_id = ? AND status = 'done' ORDER BY task_index",
+                (job_id,)
+            ).fetchall()
+        finally:
+            conn.close()
+
+        voters = []
+        for row in rows:
+            voters.extend(json.loads(row["result"]))
+        return voters
+
+    def done_aggregates(self, job_id: str, exclude=()) -> List[tuple]:
+        """
+        (task_id, aggregates state) of the job's finished tasks, skipping task ids in exclude.
+        """
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT task_id, aggregates FROM tasks WHERE job_id = ? AND status = 'done' AND aggregates IS NOT NULL",
+                (job_id,)
+            ).fetchall()
+        finally:
+            conn.close()
+        return [(row["task_id"], json.loads(row["aggregates"])) for row in rows if row["task_id"] not in exclude]
+
+    def get_task(self, task_id: str, lease_token: str) -> Optional[dict]:
+        """
+        Returns the task if lease_token currently holds it.
+        """
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                f"SELECT {TASK_COLUMNS} FROM tasks WHERE task_id = ? AND lease_token = ? AND status = 'leased'",
+                (task_id, lease_token)
+            ).fetchone()
+        finally:
+            conn.close()
+        return dict(row) if row else None
+
+    def cancel_job(self, job_id: str):
+        """
+        Stops handing out a job's tasks. Workers holding one lose their lease at the next heartbeat.
+        """
+        conn = self._connect()
+        try:
+            conn.execute(
+                "UPDATE tasks SET status = 'cancelled', lease_token = NULL, updated_at = ? "
+                "WHERE job_id = ? AND status IN ('pending', 'leased')",
+                (time.time(), job_id)
+            )
+        finally:
+            conn.close()
+
+    def purge_job(self, job_id: str):
+        """
+        Drops a job's tasks and stored results once the coordinator has collected
+        them or given up on the job.
+        """
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM tasks WHERE job_id = ?", (job_id,))
+        finally:
+            conn.close()
+
+_task_queue: Optional[SQLiteTaskQueue] = None
+
+def get_task_queue() -> Optional[SQLiteTaskQueue]:
+    """
+    The server's shared task queue, or None when distributed extraction is off.
+    """
+    global _task_queue
+    if _task_queue is None and QUEUE_DB:
+        _task_queue = SQLiteTaskQueue(QUEUE_DB)
+    return _task_queue
+
+def run_distributed_job(
+    task_queue: SQLiteTaskQueue,
+    job_id: str,
+    pdf_path: str,
+    metadata: dict,
+    progress: Optional[ProgressCallback] = None,
+    checkpoint: Optional[Checkpoint] = None,
+    poll_interval: float = COORDINATOR_POLL_INTERVAL,
+    aggregates: Optional[AreaAggregates] = None
+) -> List[VoterRecord]:
+    """
+    Coordinator side of a distributed extraction: splits the PDF into tasks,
+    waits for workers to finish them, then joins the results in page order.
+    Serial numbers are filled only after joining, so a voter at the start of a
+    task can still infer its serial from the last voter of the previous task.
+    Workers ship per-task aggregates; they are merged into `aggregates` as
+    each task finishes, without reading the voter rows back.
+    """
+    tracker = ProgressTracker(progress, checkpoint)
+    tracker.stage("opening")
+    with pdfplumber.open(pdf_path) as pdf:
+        page_count = len(pdf.pages)
+        ranges = task_ranges(page_count)
+        # Header-less pages at the start of a task continue the previous area;
+        # work that out once here rather than in every worker
+        start_areas = None
+        if not area_fully_supplied(metadata):
+            start_areas = find_start_areas(pdf, [pages.start for pages in ranges])
+
+    task_count = task_queue.enqueue_job(job_id, pdf_path, page_count, metadata, start_areas=start_areas)
+    tracker.start(page_count)
+    merged_tasks = set()
+
+    try:
+        while True:
+            tracker.check()
+            # Nobody may be leasing right now - make sure dead workers' tasks still count against MAX_ATTEMPTS
+            task_queue.requeue_expired()
+            state = task_queue.job_progress(job_id)
+            if state["failed"]:
+                raise RuntimeError(state["error"] or "Task failed")
+
+            new_pages = state["done_pages"] - tracker.pages_done
+            if new_pages > 0:
+                if aggregates is not None:
+                    for task_id, task_state in task_queue.done_aggregates(job_id, exclude=merged_tasks):
+                        aggregates.merge(AreaAggregates.from_state(task_state))
+                        merged_tasks.add(task_id)
+                tracker.page_done(state["voters"], pages=new_pages)
+            if state["done_tasks"] == task_count:
+                break
+            time.sleep(poll_interval)
+
+        tracker.stage("post_processing")
+        voters = [VoterRecord(**voter) for voter in task_queue.job_results(job_id)]
+        voters = fill_missing_serial_numbers(voters)
+    except BaseException:
+        # Stop workers at their next heartbeat, then drop the rows and any stored results
+        task_queue.cancel_job(job_id)
+        task_queue.purge_job(job_id)
+        raise
+
+    task_queue.purge_job(job_id)
+    tracker.stage("completed")
+    return voters
@@ -0,0 +1,271 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from typing import List, Optional
+
+# Largest file accepted by the chunked upload protocol
+MAX_UPLOAD_SIZE = int(os.environ.get("VOTER_MAX_UPLOAD_SIZE", str(1024 * 1024 * 1024)))
+# Unfinished sessions older than this are deleted
+SESSION_TTL = float(os.environ.get("VOTER_UPLOAD_SESSION_TTL", str(24 * 3600)))
+
+HASH_BLOCK_SIZE = 1024 * 1024
+# Bounds for per-chunk hashing (see UploadSessionStore.create)
+MIN_CHUNK_SIZE = 64 * 1024
+MAX_CHUNK_SIZE = 64 * 1024 * 1024
+
+class UploadError(Exception):
+    """Raised for invalid chunked-upload requests; `status_code` is the HTTP status to answer with."""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+# os.pwrite does not exist on Windows; fall back to seek + write under a lock
+_fallback_write_lock = threading.Lock()
+
+def positional_write(fd: int, data: bytes, offset: int):
+    if hasattr(os, "pwrite"):
+        while data:
+            written = os.pwrite(fd, data, offset)
+            data = data[written:]
+            offset += written
+    else:
+        with _fallback_write_lock:
+            os.lseek(fd, offset, os.SEEK_SET)
+            while data:
+                written = os.write(fd, data)
+                data = data[written:]
+
+def merge_range(ranges: List[List[int]], start: int, end: int) -> List[List[int]]:
+    """
+    Adds [start, end) to a sorted list of disjoint byte ranges, merging neighbours.
+    """
+    merged = []
+    for current in sorted(ranges + [[start, end]]):
+        if merged and current[0] <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], current[1])
+        else:
+            merged.append(list(current))
+    return merged
+
+class UploadSession:
+    """
+    One chunked upload. State lives in <upload_id>.json next to the
+    <upload_id>.part data file, so an upload survives a server restart.
+    """
+
+    def __init__(self, store: "UploadSessionStore", state: dict):
+        self.store = store
+        self.state = state
+
+    @property
+    def upload_id(self) -> str:
+        return self.state["upload_id"]
+
+    @property
+    def total_size(self) -> int:
+        return self.state["total_size"]
+
+    @property
+    def chunk_size(self) -> Optional[int]:
+        return self.state.get("chunk_size")
+
+    def chunk_end(self, start: int) -> int:
+        return min(start + self.chunk_size, self.total_size)
+
+    @property
+    def part_path(self) -> str:
+        return self.store.path(self.upload_id, "part")
+
+    @property
+    def received_bytes(self) -> int:
+        return sum(end - start for start, end in self.state["ranges"])
+
+    @property
+    def complete(self) -> bool:
+        return self.state["ranges"] == [[0, self.total_size]] or self.total_size == 0
+
+    def next_offset(self) -> int:
+        """
+        Start of the first missing byte range - where a resuming client continues.
+        """
+        ranges = self.state["ranges"]
+        if not ranges or ranges[0][0] > 0:
+            return 0
+        return ranges[0][1]
+
+    def record_chunk(self, start: int, end: int, chunk_hash: Optional[str] = None):
+        # Chunks of one upload may arrive in parallel: merge into the latest saved state
+        latest = self.store.get(self.upload_id)
+        if latest is not None:
+            self.state = latest.state
+        self.state["ranges"] = merge_range(self.state["ranges"], start, end)
+        if chunk_hash is not None:
+            self.state["chunk_hashes"][str(start // self.chunk_size)] = chunk_hash
+        self.state["updated_at"] = time.time()
+        self.store.save(self)
+
+    def sha256(self, start: int = 0, end: Optional[int] = None) -> str:
+        """
+        Hash of the data file, or of bytes [start, end) of it.
+        """
+        remaining = (self.total_size if end is None else end) - start
+        digest = hashlib.sha256()
+        with open(self.part_path, "rb") as f:
+            f.seek(start)
+            while remaining > 0:
+                block = f.read(min(HASH_BLOCK_SIZE, remaining))
+                if not block:
+                    break
+                digest.update(block)
+                remaining -= len(block)
+        return digest.hexdigest()
+
+    def to_dict(self) -> dict:
+        return {
+            "upload_id": self.upload_id,
+            "filename": self.state["filename"],
+            "total_size": self.total_size,
+            "received_bytes": self.received_bytes,
+            "next_offset": self.next_offset(),
+            "ranges": self.state["ranges"],
+            "complete": self.complete,
+            "chunk_size": self.chunk_size,
+        }
+
+class UploadSessionStore:
+    """
+    Chunked, resumable uploads: init -> write chunks at offsets -> finalize.
+    Chunks are written straight to their position in a preallocated file
+    with positional writes; nothing is buffered in memory.
+
+    Integrity is checked either against a sha256 of the whole file, given at
+    init or finalize, or - when the session is created with a chunk_size -
+    per chunk: every chunk is sent whole, at a multiple of chunk_size, with
+    its own sha256. Clients that cannot hash a large file incrementally (the
+    browser) only ever hash one chunk at a time.
+    """
+
+    def __init__(self, upload_dir: str):
+        self.session_dir = os.path.join(upload_dir, "sessions")
+        os.makedirs(self.session_dir, exist_ok=True)
+
+    def path(self, upload_id: str, kind: str) -> str:
+        return os.path.join(self.session_dir, f"{upload_id}.{kind}")
+
+    def create(self, filename: str, total_size: int, sha256: str, metadata: dict, chunk_size: Optional[int] = None) -> UploadSession:
+        if not filename.endswith('.pdf'):
+            raise UploadError(400, "Only PDF files are allowed")
+        if total_size < 0 or total_size > MAX_UPLOAD_SIZE:
+            raise UploadError(413, f"File size must be between 0 and {MAX_UPLOAD_SIZE} bytes")
+        if chunk_size is not None and not MIN_CHUNK_SIZE <= chunk_size <= MAX_CHUNK_SIZE:
+            raise UploadError(400, f"chunk_size must be between {MIN_CHUNK_SIZE} and {MAX_CHUNK_SIZE} bytes")
+
+        self.purge_stale()
+
+        now = time.time()
+        session = UploadSession(self, {
+            "upload_id": str(uuid.uuid4()),
+            "filename": filename,
+            "total_size": total_size,
+            "sha256": sha256.lower(),
+            "metadata": metadata,
+            "ranges": [],
+            "chunk_size": chunk_size,
+            "chunk_hashes": {},
+            "created_at": now,
+            "updated_at": now,
+        })
+
+        # Preallocate (sparse where supported) so chunks can land in any order
+        with open(session.part_path, "wb") as f:
+            f.truncate(total_size)
+        self.save(session)
+        return session
+
+    def save(self, session: UploadSession):
+        state_path = self.path(session.upload_id, "json")
+        tmp_path = state_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(session.state, f, ensure_ascii=False)
+        os.replace(tmp_path, state_path)
+
+    def get(self, upload_id: str) -> Optional[UploadSession]:
+        # upload_id comes from the URL - only accept our own uuid format
+        try:
+            uuid.UUID(upload_id)
+        except ValueError:
+            return None
+
+        try:
+            with open(self.path(upload_id, "json"), encoding="utf-8") as f:
+                return UploadSession(self, json.load(f))
+        except FileNotFoundError:
+            return None
+
+    def open_for_write(self, session: UploadSession, offset: int, length: Optional[int]) -> int:
+        if offset < 0 or offset > session.total_size:
+            raise UploadError(416, "Offset outside the file")
+        if length is not None and offset + length > session.total_size:
+            raise UploadError(416, "Chunk extends past the declared file size")
+        if session.chunk_size:
+            if offset % session.chunk_size:
+                raise UploadError(400, f"Offset must be a multiple of the chunk size ({session.chunk_size})")
+            if length is not None and offset + length != session.chunk_end(offset):
+                raise UploadError(400, "Chunks must be sent whole")
+        return os.open(session.part_path, os.O_WRONLY | getattr(os, "O_BINARY", 0))
+
+    def verify(self, session: UploadSession, sha256: Optional[str] = None):
+        if not session.complete:
+            raise UploadError(409, f"Upload incomplete: {session.received_bytes} of {session.total_size} bytes received")
+
+        if session.chunk_size and not sha256:
+            self._verify_chunks(session)
+            return
+
+        expected = (sha256 or session.state["sha256"]).lower()
+        if not expected:
+            raise UploadError(400, "A sha256 hash is required to finalize")
+        if session.sha256() != expected:
+            # Start over: we cannot tell which chunk was corrupted
+            session.state["ranges"] = []
+            self.save(session)
+            raise UploadError(422, "sha256 mismatch - the file was corrupted in transit, upload it again")
+
+    def _verify_chunks(self, session: UploadSession):
+        # Re-hash what landed on disk; only the chunks that do not match are sent again
+        good, bad = [], []
+        for start in range(0, session.total_size, session.chunk_size):
+            expected = session.state["chunk_hashes"].get(str(start // session.chunk_size))
+            (good if expected == session.sha256(start, session.chunk_end(start)) else bad).append(start)
+
+        if bad:
+            ranges = []
+            for start in good:
+                ranges = merge_range(ranges, start, session.chunk_end(start))
+            session.state["ranges"] = ranges
+            for start in bad:
+                session.state["chunk_hashes"].pop(str(start // session.chunk_size), None)
+            self.save(session)
+            raise UploadError(422, f"sha256 mismatch in {len(bad)} chunk(s) - send the missing ranges again")
+
+    def discard(self, session: UploadSession):
+        for kind in ("json", "part"):
+            try:
+                os.remove(self.path(session.upload_id, kind))
+            except FileNotFoundError:
+                pass
+
+    def purge_stale(self):
+        cutoff = time.time() - SESSION_TTL
+        for name in os.listdir(self.session_dir):
+            if not name.endswith(".json"):
+                continue
+            upload_id = name[:-len(".json")]
+            session = self.get(upload_id)
+            if session is not None and session.state["updated_at"] < cutoff:
+                self.discard(session)
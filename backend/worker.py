@@ -0,0 +1,230 @@
+"""
+Extraction worker for distributed jobs.
+
+Pulls page-range tasks from the shared queue, runs extract_voters_from_pdf on
+them and pushes the voters back. Runs either next to the server against the
+SQLite queue file directly, or on another machine against the server's
+/api/worker endpoints:
+
+    python -m backend.worker --db uploads/tasks.db
+    python -m backend.worker --server http://10.0.0.5:8000 --token <VOTER_WORKER_TOKEN>
+"""
+import argparse
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from typing import List, Optional
+
+from .processing.aggregates import AreaAggregates
+from .processing.pdf_engine import extract_voters_from_pdf
+from .processing.progress import ExtractionCancelled
+from .processing.records import records_to_dicts
+from .taskqueue import SQLiteTaskQueue, LEASE_SECONDS
+
+POLL_INTERVAL = 2.0
+
+class LocalQueueClient:
+    """
+    Talks to the SQLite queue directly. PDFs are read from the paths stored in the tasks.
+    """
+
+    def __init__(self, task_queue: SQLiteTaskQueue):
+        self.task_queue = task_queue
+
+    def lease(self, worker_id: str, lease_seconds: float) -> Optional[dict]:
+        return self.task_queue.lease(worker_id, lease_seconds)
+
+    def heartbeat(self, task: dict, lease_seconds: float) -> bool:
+        return self.task_queue.heartbeat(task["task_id"], task["lease_token"], lease_seconds)
+
+    def complete(self, task: dict, voters: List[dict], aggregates: list) -> bool:
+        return self.task_queue.complete(task["task_id"], task["lease_token"], voters, aggregates)
+
+    def fail(self, task: dict, error: str) -> bool:
+        return self.task_queue.fail(task["task_id"], task["lease_token"], error)
+
+    def fetch_pdf(self, task: dict) -> str:
+        return task["pdf_path"]
+
+    def release_pdf(self, task: dict, path: str):
+        pass
+
+class HttpQueueClient:
+    """
+    Talks to a server's /api/worker endpoints; PDFs are downloaded per task.
+    """
+
+    def __init__(self, server_url: str, token: str, timeout: float = 60):
+        self.server_url = server_url.rstrip("/")
+        self.token = token
+        self.timeout = timeout
+
+    def _request(self, method: str, path: str, body: Optional[dict] = None):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8") if body is not None else None
+        request = urllib.request.Request(
+            f"{self.server_url}{path}",
+            data=data,
+            method=method,
+            headers={"Content-Type": "application/json", "X-Worker-Token": self.token}
+        )
+        return urllib.request.urlopen(request, timeout=self.timeout)
+
+    def _post(self, path: str, body: dict) -> Optional[dict]:
+        with self._request("POST", path, body) as response:
+            if response.status == 204:
+                return None
+            return json.loads(response.read().decode("utf-8"))
+
+    def _post_leased(self, path: str, body: dict) -> bool:
+        # 409 means our lease is gone
+        try:
+            self._post(path, body)
+            return True
+        except urllib.error.HTTPError as e:
+            if e.code == 409:
+                return False
+            raise
+
+    def lease(self, worker_id: str, lease_seconds: float) -> Optional[dict]:
+        return self._post("/api/worker/lease", {"worker_id": worker_id, "lease_seconds": lease_seconds})
+
+    def heartbeat(self, task: dict, lease_seconds: float) -> bool:
+        return self._post_leased(
+            f"/api/worker/tasks/{task['task_id']}/heartbeat",
+            {"lease_token": task["lease_token"], "lease_seconds": lease_seconds}
+        )
+
+    def complete(self, task: dict, voters: List[dict], aggregates: list) -> bool:
+        return self._post_leased(
+            f"/api/worker/tasks/{task['task_id']}/complete",
+            {"lease_token": task["lease_token"], "voters": voters, "aggregates": aggregates}
+        )
+
+    def fail(self, task: dict, error: str) -> bool:
+        return self._post_leased(
+            f"/api/worker/tasks/{task['task_id']}/fail",
+            {"lease_token": task["lease_token"], "error": error}
+        )
+
+    def fetch_pdf(self, task: dict) -> str:
+        fd, path = tempfile.mkstemp(suffix=".pdf", prefix=f"task-{task['task_id']}-")
+        with os.fdopen(fd, "wb") as out, self._request(
+            "GET", f"/api/worker/tasks/{task['task_id']}/file?lease_token={task['lease_token']}"
+        ) as response:
+            while True:
+                chunk = response.read(1024 * 1024)
+                if not chunk:
+                    break
+                out.write(chunk)
+        return path
+
+    def release_pdf(self, task: dict, path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+class Worker:
+    """
+    Lease -> extract -> complete loop with a heartbeat thread per task.
+    If a heartbeat is rejected (lease expired and handed to someone else, or
+    the job was cancelled) the extraction stops at its next page checkpoint.
+    """
+
+    def __init__(self, client, worker_id: Optional[str] = None, lease_seconds: float = LEASE_SECONDS):
+        self.client = client
+        self.worker_id = worker_id or f"{socket.gethostname()}-{uuid.uuid4().hex[:8]}"
+        self.lease_seconds = lease_seconds
+        self.heartbeat_interval = lease_seconds / 3
+
+    def run_forever(self, poll_interval: float = POLL_INTERVAL):
+        print(f"Worker {self.worker_id} started")
+        while True:
+            try:
+                if not self.run_once():
+                    time.sleep(poll_interval)
+            except (urllib.error.URLError, OSError) as e:
+                print(f"[WARNING] Queue unreachable: {e}")
+                time.sleep(poll_interval)
+
+    def run_once(self) -> bool:
+        """
+        Processes at most one task. Returns False when the queue was empty.
+        """
+        task = self.client.lease(self.worker_id, self.lease_seconds)
+        if task is None:
+            return False
+
+        lease_lost = threading.Event()
+        stop_heartbeat = threading.Event()
+
+        def heartbeat():
+            while not stop_heartbeat.wait(self.heartbeat_interval):
+                try:
+                    if not self.client.heartbeat(task, self.lease_seconds):
+                        lease_lost.set()
+                        return
+                except Exception as e:
+                    # Keep trying; the lease only lapses if this persists past lease_seconds
+                    print(f"[WARNING] Heartbeat failed for task {task['task_id']}: {e}")
+
+        def checkpoint():
+            if lease_lost.is_set():
+                raise ExtractionCancelled("Task lease lost")
+
+        heartbeat_thread = threading.Thread(target=heartbeat, daemon=True)
+        heartbeat_thread.start()
+        pdf_path = None
+        try:
+            pdf_path = self.client.fetch_pdf(task)
+            aggregates = AreaAggregates()
+            voters = extract_voters_from_pdf(
+                pdf_path,
+                task["metadata"],
+                checkpoint=checkpoint,
+                pages=range(task["page_start"], task["page_end"]),
+                fill_serials=False,
+                aggregates=aggregates,
+                start_area=task.get("start_area")
+            )
+            stop_heartbeat.set()
+            if not self.client.complete(task, records_to_dicts(voters), aggregates.to_state()):
+                print(f"[WARNING] Lease lost before completing task {task['task_id']}, result dropped")
+        except ExtractionCancelled:
+            print(f"[INFO] Abandoned task {task['task_id']}: lease lost")
+        except Exception as e:
+            stop_heartbeat.set()
+            print(f"[ERROR] Task {task['task_id']} failed: {e}")
+            self.client.fail(task, str(e))
+        finally:
+            stop_heartbeat.set()
+            heartbeat_thread.join()
+            if pdf_path:
+                self.client.release_pdf(task, pdf_path)
+        return True
+
+def main():
+    parser = argparse.ArgumentParser(description="Voter extraction worker")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--db", help="Path of the SQLite task queue (same machine as the server)")
+    target.add_argument("--server", help="Base URL of the server, e.g. http://10.0.0.5:8000")
+    parser.add_argument("--token", default=os.environ.get("VOTER_WORKER_TOKEN", ""), help="Worker token for --server")
+    parser.add_argument("--worker-id", default=None)
+    parser.add_argument("--lease-seconds", type=float, default=LEASE_SECONDS)
+    args = parser.parse_args()
+
+    if args.db:
+        client = LocalQueueClient(SQLiteTaskQueue(args.db))
+    else:
+        client = HttpQueueClient(args.server, args.token)
+
+    Worker(client, worker_id=args.worker_id, lease_seconds=args.lease_seconds).run_forever()
+
+if __name__ == "__main__":
+    main()
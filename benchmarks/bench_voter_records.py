@@ -0,0 +1,106 @@
+"""
+Compares the per-voter cost of building pydantic Voter objects during
+extraction (the old pipeline) against internal VoterRecord dataclasses that
+are validated once at the API boundary.
+
+Run from the repository root:
+    python -m benchmarks.bench_voter_records [voter_count]
+"""
+import sys
+import time
+import tracemalloc
+
+from backend.models import Voter, ExtractionResult
+from backend.processing.records import VoterRecord, records_to_dicts
+
+METADATA = {
+    "district": "ব্রাহ্মণবাড়িয়া",
+    "upazila": "সরাইল",
+    "union": "সরাইল",
+    "ward_number": "3",
+    "voter_area": "সরাইল পূর্ব",
+    "voter_area_code": "1234",
+}
+
+def build(cls, count: int) -> list:
+    """
+    Mimics extract_voters_from_pdf: parse_voter_cell fills the personal fields,
+    then the loop assigns the area metadata and serial number one by one.
+    """
+    voters = []
+    for i in range(count):
+        voter = cls()
+        voter.name = f"মোঃ আব্দুল করিম {i}"
+        voter.voter_id = str(1000000000 + i)
+        voter.father_name = "মোঃ আব্দুল রহিম"
+        voter.mother_name = "মোছাঃ রহিমা খাতুন"
+        voter.occupation = "কৃষক"
+        voter.date_of_birth = "01/02/1970"
+        voter.address = "সরাইল, ব্রাহ্মণবাড়িয়া"
+
+        voter.district = METADATA["district"]
+        voter.upazila = METADATA["upazila"]
+        voter.union = METADATA["union"]
+        voter.ward_number = METADATA["ward_number"]
+        voter.voter_area = METADATA["voter_area"]
+        voter.voter_area_code = METADATA["voter_area_code"]
+        voter.serial_no = str(i + 1).zfill(4)
+        voters.append(voter)
+    return voters
+
+def serialize_models(voters: list) -> str:
+    # Old endpoint: ExtractionResult(data=voters) validated the list, then the
+    # response_model round-trip (dump -> validate -> JSON) ran on top of it
+    result = ExtractionResult(job_id="bench", status="completed", total_voters=len(voters), data=voters)
+    return ExtractionResult.model_validate(result.model_dump()).model_dump_json()
+
+def serialize_records(records: list) -> str:
+    # New endpoint: plain dicts validated once by the response model
+    payload = {"job_id": "bench", "status": "completed", "total_voters": len(records), "data": records_to_dicts(records)}
+    return ExtractionResult.model_validate(payload).model_dump_json()
+
+def measure(label: str, cls, serialize, count: int) -> dict:
+    # Timing pass (tracemalloc would distort the timings)
+    start = time.perf_counter()
+    voters = build(cls, count)
+    built = time.perf_counter()
+    serialize(voters)
+    done = time.perf_counter()
+    del voters
+
+    # Allocation pass
+    tracemalloc.start()
+    voters = build(cls, count)
+    retained, _ = tracemalloc.get_traced_memory()
+    serialize(voters)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    row = {
+        "label": label,
+        "build_us_per_voter": (built - start) / count * 1e6,
+        "serialize_us_per_voter": (done - built) / count * 1e6,
+        "retained_bytes_per_voter": retained / count,
+        "peak_bytes_per_voter": peak / count,
+    }
+    print(
+        f"{label:<16} build {row['build_us_per_voter']:6.2f} us  "
+        f"serialize {row['serialize_us_per_voter']:6.2f} us  "
+        f"retained {row['retained_bytes_per_voter']:6.0f} B  "
+        f"peak {row['peak_bytes_per_voter']:6.0f} B   (per voter)"
+    )
+    return row
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    print(f"{count} voters")
+    old = measure("pydantic Voter", Voter, serialize_models, count)
+    new = measure("VoterRecord", VoterRecord, serialize_records, count)
+
+    old_total = old["build_us_per_voter"] + old["serialize_us_per_voter"]
+    new_total = new["build_us_per_voter"] + new["serialize_us_per_voter"]
+    print(f"time saved: {100 * (1 - new_total / old_total):.0f}%  "
+          f"retained memory saved: {100 * (1 - new['retained_bytes_per_voter'] / old['retained_bytes_per_voter']):.0f}%")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""
+Concurrent load test for a running server.
+
+Fires uploads of benchmark PDFs at the API from several threads and reports
+latency percentiles, throughput, error rate and server RSS over time (sampled
+from /api/stats). Results are written as JSON so runs with different worker
+pool settings can be compared.
+
+Run from the repository root against a server started separately, e.g.:
+    VOTER_MAX_WORKERS=4 python -m uvicorn backend.main:app --port 8000
+    python -m benchmarks.load_test --pdf roll.pdf --concurrency 8 --requests 40 --output load.json
+
+Without --retry-429, answers rejected by admission control count as errors
+(status 429); with it, clients back off as told and the wait counts as latency.
+
+Modes:
+    upload - POST /api/upload, latency is the full synchronous response
+    jobs   - POST /api/jobs, follow the SSE stream until done, then GET the result;
+             also records time to the first progress event
+"""
+import argparse
+import itertools
+import json
+import math
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from typing import List, Optional
+
+MAX_RETRY_WAIT = 30.0
+
+METADATA_FIELDS = ("district", "upazila", "union", "ward_number", "voter_area", "voter_area_code")
+
+def multipart_body(pdf_path: str, fields: dict) -> tuple:
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(
+            f"--{boundary}\r\nContent-Disposition: form-data; name=\"{name}\"\r\n\r\n{value}\r\n".encode("utf-8")
+        )
+    with open(pdf_path, "rb") as f:
+        content = f.read()
+    parts.append(
+        f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"{os.path.basename(pdf_path)}\"\r\n"
+        f"Content-Type: application/pdf\r\n\r\n".encode("utf-8") + content + b"\r\n"
+    )
+    parts.append(f"--{boundary}--\r\n".encode("utf-8"))
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """
+    Nearest-rank percentile.
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = min(max(1, math.ceil(pct / 100 * len(ordered))), len(ordered))
+    return ordered[rank - 1]
+
+class LoadTest:
+    def __init__(self, args):
+        self.base_url = args.url.rstrip("/")
+        self.mode = args.mode
+        self.timeout = args.timeout
+        self.retry_429 = args.retry_429
+        self.bodies = [multipart_body(path, {field: "" for field in METADATA_FIELDS}) for path in args.pdf]
+        self.pdf_names = [os.path.basename(path) for path in args.pdf]
+        self.results: List[dict] = []
+        self.rss_samples: List[dict] = []
+        self._lock = threading.Lock()
+        self._counter = itertools.count()
+        self._stop_sampling = threading.Event()
+
+    def _post(self, path: str, body: bytes, content_type: str):
+        request = urllib.request.Request(
+            f"{self.base_url}{path}", data=body, method="POST", headers={"Content-Type": content_type}
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return json.loads(response.read().decode("utf-8"))
+
+    def _get_json(self, path: str):
+        with urllib.request.urlopen(f"{self.base_url}{path}", timeout=self.timeout) as response:
+            return json.loads(response.read().decode("utf-8"))
+
+    def _run_upload(self, body: bytes, content_type: str, result: dict):
+        data = self._post("/api/upload", body, content_type)
+        result["voters"] = data["total_voters"]
+
+    def _run_job(self, body: bytes, content_type: str, result: dict, started: float):
+        job = self._post("/api/jobs", body, content_type)
+        result["accepted_seconds"] = time.perf_counter() - started
+
+        with urllib.request.urlopen(f"{self.base_url}/api/jobs/{job['job_id']}/events", timeout=self.timeout) as stream:
+            event_name = None
+            for raw in stream:
+                line = raw.decode("utf-8").rstrip("\r\n")
+                if line.startswith("event:"):
+                    event_name = line[len("event:"):].strip()
+                elif line.startswith("data:") and event_name == "progress" and "first_event_seconds" not in result:
+                    result["first_event_seconds"] = time.perf_counter() - started
+                elif line.startswith("data:") and event_name == "done":
+                    break
+
+        data = self._get_json(f"/api/jobs/{job['job_id']}")
+        result["voters"] = data["total_voters"]
+
+    def one_request(self):
+        index = next(self._counter)
+        body, content_type = self.bodies[index % len(self.bodies)]
+        result = {"pdf": self.pdf_names[index % len(self.bodies)], "started_at": time.time()}
+        started = time.perf_counter()
+        result["retries"] = 0
+        try:
+            while True:
+                try:
+                    if self.mode == "upload":
+                        self._run_upload(body, content_type, result)
+                    else:
+                        self._run_job(body, content_type, result, started)
+                    result["status"] = 200
+                    break
+                except urllib.error.HTTPError as e:
+                    if e.code == 429 and self.retry_429:
+                        # Back off as the server asks; latency includes the wait
+                        result["retries"] += 1
+                        time.sleep(min(float(e.headers.get("Retry-After", "1")), MAX_RETRY_WAIT))
+                        continue
+                    raise
+        except urllib.error.HTTPError as e:
+            result["status"] = e.code
+            result["error"] = e.read().decode("utf-8", "replace")[:200]
+        except Exception as e:
+            result["status"] = None
+            result["error"] = str(e)
+        result["latency_seconds"] = time.perf_counter() - started
+
+        with self._lock:
+            self.results.append(result)
+
+    def sample_rss(self, interval: float, started: float):
+        while not self._stop_sampling.is_set():
+            try:
+                stats = self._get_json("/api/stats")
+                stats["t"] = round(time.perf_counter() - started, 2)
+                self.rss_samples.append(stats)
+            except Exception:
+                pass
+            self._stop_sampling.wait(interval)
+
+    def run(self, concurrency: int, total_requests: Optional[int], duration: Optional[float], rss_interval: float) -> dict:
+        started = time.perf_counter()
+        sampler = threading.Thread(target=self.sample_rss, args=(rss_interval, started), daemon=True)
+        sampler.start()
+
+        remaining = itertools.count()
+
+        def client():
+            while True:
+                if total_requests is not None and next(remaining) >= total_requests:
+                    return
+                if duration is not None and time.perf_counter() - started >= duration:
+                    return
+                self.one_request()
+
+        clients = [threading.Thread(target=client) for _ in range(concurrency)]
+        for thread in clients:
+            thread.start()
+        for thread in clients:
+            thread.join()
+
+        elapsed = time.perf_counter() - started
+        self._stop_sampling.set()
+        sampler.join()
+        return self.report(concurrency, elapsed)
+
+    def report(self, concurrency: int, elapsed: float) -> dict:
+        ok = [r for r in self.results if r["status"] == 200]
+        latencies = [r["latency_seconds"] for r in ok]
+        status_counts = {}
+        for r in self.results:
+            key = str(r["status"]) if r["status"] is not None else "connection_error"
+            status_counts[key] = status_counts.get(key, 0) + 1
+
+        rss_values = [s["rss_bytes"] for s in self.rss_samples if s.get("rss_bytes")]
+        summary = {
+            "mode": self.mode,
+            "url": self.base_url,
+            "concurrency": concurrency,
+            "requests": len(self.results),
+            "elapsed_seconds": round(elapsed, 3),
+            "throughput_rps": round(len(ok) / elapsed, 3) if elapsed else 0,
+            "voters_per_second": round(sum(r.get("voters", 0) for r in ok) / elapsed, 1) if elapsed else 0,
+            "error_rate": round(1 - len(ok) / len(self.results), 4) if self.results else 0,
+            "status_counts": status_counts,
+            "retries_after_429": sum(r.get("retries", 0) for r in self.results),
+            "latency_seconds": {
+                "p50": percentile(latencies, 50),
+                "p95": percentile(latencies, 95),
+                "p99": percentile(latencies, 99),
+                "max": max(latencies) if latencies else None,
+            },
+            "server_rss_bytes": {
+                "start": rss_values[0] if rss_values else None,
+                "peak": max(rss_values) if rss_values else None,
+                "end": rss_values[-1] if rss_values else None,
+            },
+        }
+        if self.mode == "jobs":
+            first_events = [r["first_event_seconds"] for r in ok if "first_event_seconds" in r]
+            summary["first_event_seconds"] = {"p50": percentile(first_events, 50), "p95": percentile(first_events, 95)}
+
+        return {"summary": summary, "rss_timeline": self.rss_samples, "requests": self.results}
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent load test for the voter extraction API")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--pdf", action="append", required=True, help="Benchmark PDF (repeat for several)")
+    parser.add_argument("--mode", choices=("upload", "jobs"), default="upload")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=None, help="Total requests (default 20 unless --duration)")
+    parser.add_argument("--duration", type=float, default=None, help="Stop starting new requests after this many seconds")
+    parser.add_argument("--timeout", type=float, default=600)
+    parser.add_argument("--retry-429", action="store_true", help="Honour Retry-After instead of counting 429 as an error")
+    parser.add_argument("--rss-interval", type=float, default=1.0)
+    parser.add_argument("--output", default="load_test_results.json")
+    args = parser.parse_args()
+
+    if args.requests is None and args.duration is None:
+        args.requests = 20
+
+    results = LoadTest(args).run(args.concurrency, args.requests, args.duration, args.rss_interval)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+
+    print(json.dumps(results["summary"], indent=2))
+    print(f"Full results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,27 @@
 'use client';
 
 import { useState } from 'react';
-import { uploadPDF, ExtractionResult } from '@/lib/api';
+import { extractWithProgress, ExtractionResult, JobProgress } from '@/lib/api';
 import { VoterTable } from '@/components/VoterTable';
 import { WordReplacement } from '@/components/WordReplacement';
 import { UploadCloud, FileText, Loader2, AlertCircle } from 'lucide-react';
 import { motion, AnimatePresence } from 'framer-motion';
 import clsx from 'clsx';
 
+const formatProgress = (progress: JobProgress | null): string => {
+  if (progress?.stage === 'uploading' && progress.total_bytes) {
+    return `Uploading ${Math.floor(100 * (progress.sent_bytes ?? 0) / progress.total_bytes)}%...`;
+  }
+  if (!progress || !progress.total_pages) return 'Processing...';
+  if (progress.stage === 'post_processing') return `Finishing up (${progress.voters ?? 0} voters)...`;
+
+  let text = `Page ${progress.page ?? 0} of ${progress.total_pages} · ${progress.voters ?? 0} voters`;
+  if (progress.eta_seconds != null) {
+    text += ` · ~${Math.ceil(progress.eta_seconds)}s left`;
+  }
+  return text;
+};
+
 export default function Home() {
   const [file, setFile] = useState<File | null>(null);
   const [loading, setLoading] = useState(false);
@@ -15,13 +29,14 @@ export default function Home() {
   const [error, setError] = useState<string | null>(null);
   const [dragActive, setDragActive] = useState(false);
   const [copied, setCopied] = useState(false);
+  const [progress, setProgress] = useState<JobProgress | null>(null);
 
   const [processedResult, setProcessedResult] = useState<ExtractionResult | null>(null);
 
   // Metadata state
   const [metadata, setMetadata] = useState({
-    district: 'ব্রাহ্মণবাড়িয়া',
-    upazila: 'সরাইল',
+    district: '',
+    upazila: '',
     union: '',
     ward_number: '',
     voter_area: '',
@@ -68,14 +83,16 @@ export default function Home() {
     if (!file) return;
     setLoading(true);
     setError(null);
+    setProgress(null);
     try {
-      const data = await uploadPDF(file, metadata);
+      const data = await extractWithProgress(file, metadata, setProgress);
       setResult(data);
     } catch (err: any) {
       console.error(err);
       setError(err.response?.data?.detail || "An error occurred during processing.");
     } finally {
       setLoading(false);
+      setProgress(null);
     }
   };
 
@@ -177,7 +194,8 @@ export default function Home() {
 
         {/* Metadata Input Form */}
         <div className="mb-8 p-6 bg-white dark:bg-zinc-900 rounded-xl shadow border border-zinc-200 dark:border-zinc-800">
-          <h2 className="text-lg font-semibold mb-4">Voter Area Information</h2>
+          <h2 className="text-lg font-semibold mb-1">Voter Area Information</h2>
+          <p className="text-sm text-zinc-500 mb-4">Leave a field blank to read it from each page header of the PDF.</p>
           <div className="grid grid-cols-1 md:grid-cols-2 gap-4">
             <input
               type="text"
@@ -287,7 +305,7 @@ export default function Home() {
             {loading && (
               <div className="flex items-center gap-2 text-blue-600 dark:text-blue-400 mt-2">
                 <Loader2 className="animate-spin" />
-                <span>Processing...</span>
+                <span>{formatProgress(progress)}</span>
               </div>
             )}
           </div>
@@ -7,6 +7,7 @@ export interface Voter {
   name?: string;
   voter_id?: string;
   father_name?: string;
+  relation?: 'father' | 'husband';
   mother_name?: string;
   occupation?: string;
   date_of_birth?: string;
@@ -35,7 +36,7 @@ export interface Metadata {
   voter_area_code: string;
 }
 
-export const uploadPDF = async (file: File, metadata: Metadata): Promise<ExtractionResult> => {
+const buildUploadForm = (file: File, metadata: Metadata): FormData => {
   const formData = new FormData();
   formData.append('file', file);
   formData.append('district', metadata.district);
@@ -44,11 +45,228 @@ export const uploadPDF = async (file: File, metadata: Metadata): Promise<Extract
   formData.append('ward_number', metadata.ward_number);
   formData.append('voter_area', metadata.voter_area);
   formData.append('voter_area_code', metadata.voter_area_code);
+  return formData;
+};
 
-  const response = await axios.post<ExtractionResult>(`${API_BASE_URL}/upload`, formData, {
+export const uploadPDF = async (file: File, metadata: Metadata): Promise<ExtractionResult> => {
+  const response = await axios.post<ExtractionResult>(`${API_BASE_URL}/upload`, buildUploadForm(file, metadata), {
     headers: {
       'Content-Type': 'multipart/form-data',
     },
   });
   return response.data;
 };
+
+export interface JobStatus {
+  job_id: string;
+  status: string;
+  total_voters: number;
+  error?: string | null;
+}
+
+export interface JobProgress {
+  stage: string;
+  page?: number;
+  total_pages?: number;
+  voters?: number;
+  elapsed_seconds?: number;
+  pages_per_sec?: number;
+  eta_seconds?: number | null;
+  error?: string | null;
+  // Only set while a large file is still uploading
+  sent_bytes?: number;
+  total_bytes?: number;
+}
+
+export const startJob = async (file: File, metadata: Metadata): Promise<JobStatus> => {
+  const response = await axios.post<JobStatus>(`${API_BASE_URL}/jobs`, buildUploadForm(file, metadata), {
+    headers: {
+      'Content-Type': 'multipart/form-data',
+    },
+  });
+  return response.data;
+};
+
+export const getJobResult = async (jobId: string): Promise<ExtractionResult> => {
+  const response = await axios.get<ExtractionResult>(`${API_BASE_URL}/jobs/${jobId}`);
+  return response.data;
+};
+
+export type RollupLevel = 'area' | 'union' | 'upazila' | 'district';
+
+// One area (or union/upazila/district roll-up) from /api/jobs/{id}/aggregates
+export interface AreaAggregate {
+  district?: string;
+  upazila?: string;
+  union?: string;
+  ward_number?: string;
+  voter_area?: string;
+  voter_area_code?: string;
+  total_voters: number;
+  gender: { female: number; unknown: number };
+  relations: Record<string, number>;
+  age_brackets: Record<string, number>;
+  occupations: Record<string, number>;
+  missing_rates: Record<string, number>;
+}
+
+// Statistics are maintained server-side while the job runs - no need to scan result.data
+export const getJobAggregates = async (jobId: string, level: RollupLevel = 'area'): Promise<AreaAggregate[]> => {
+  const response = await axios.get<{ areas: AreaAggregate[] }>(`${API_BASE_URL}/jobs/${jobId}/aggregates`, {
+    params: { level },
+  });
+  return response.data.areas;
+};
+
+// Subscribes to the job's Server-Sent Events stream. Returns a function that closes it.
+export const subscribeJobEvents = (
+  jobId: string,
+  onProgress: (event: JobProgress) => void,
+  onDone: (status: string, error?: string | null) => void,
+): (() => void) => {
+  const source = new EventSource(`${API_BASE_URL}/jobs/${jobId}/events`);
+
+  source.addEventListener('progress', (e) => {
+    onProgress(JSON.parse((e as MessageEvent).data));
+  });
+  source.addEventListener('done', (e) => {
+    const data = JSON.parse((e as MessageEvent).data);
+    source.close();
+    onDone(data.status, data.error);
+  });
+  source.onerror = () => {
+    source.close();
+    onDone('failed', 'Lost connection to the server.');
+  };
+
+  return () => source.close();
+};
+
+export interface UploadStatus {
+  upload_id: string;
+  filename: string;
+  total_size: number;
+  received_bytes: number;
+  next_offset: number;
+  ranges: number[][];
+  complete: boolean;
+  chunk_size?: number | null;
+}
+
+// Files above this size use the chunked, resumable upload protocol
+const RESUMABLE_THRESHOLD = 8 * 1024 * 1024;
+const CHUNK_SIZE = 2 * 1024 * 1024;
+const CHUNK_RETRIES = 5;
+// Finalize re-hashes the chunks; ones that were corrupted on disk are sent again this many times
+const FINALIZE_RETRIES = 2;
+
+// WebCrypto cannot hash incrementally, so each chunk is hashed on its own - only one chunk is ever in memory
+const sha256Hex = async (blob: Blob): Promise<string> => {
+  const digest = await crypto.subtle.digest('SHA-256', await blob.arrayBuffer());
+  return Array.from(new Uint8Array(digest)).map((b) => b.toString(16).padStart(2, '0')).join('');
+};
+
+const sleep = (ms: number) => new Promise((resolve) => setTimeout(resolve, ms));
+
+// Remembers the upload id per file so a reload or dropped connection resumes instead of restarting
+const uploadKey = (file: File) => `voter-upload:${file.name}:${file.size}:${file.lastModified}`;
+
+const findOrCreateUpload = async (file: File, metadata: Metadata): Promise<UploadStatus> => {
+  const savedId = localStorage.getItem(uploadKey(file));
+  if (savedId) {
+    try {
+      const response = await axios.get<UploadStatus>(`${API_BASE_URL}/uploads/${savedId}`);
+      if (response.data.chunk_size === CHUNK_SIZE) return response.data;
+    } catch {
+      // Expired or unknown - start a new upload below
+    }
+    localStorage.removeItem(uploadKey(file));
+  }
+
+  const response = await axios.post<UploadStatus>(`${API_BASE_URL}/uploads`, {
+    filename: file.name,
+    size: file.size,
+    chunk_size: CHUNK_SIZE,
+    ...metadata,
+  });
+  localStorage.setItem(uploadKey(file), response.data.upload_id);
+  return response.data;
+};
+
+// Chunks ([start, end) byte ranges) the server does not have yet
+const missingChunks = (status: UploadStatus): number[][] => {
+  const missing: number[][] = [];
+  for (let start = 0; start < status.total_size; start += CHUNK_SIZE) {
+    const end = Math.min(start + CHUNK_SIZE, status.total_size);
+    if (!status.ranges.some(([rangeStart, rangeEnd]) => rangeStart <= start && end <= rangeEnd)) {
+      missing.push([start, end]);
+    }
+  }
+  return missing;
+};
+
+const putChunk = async (uploadId: string, file: File, offset: number, end: number): Promise<void> => {
+  const chunk = file.slice(offset, end);
+  const hash = await sha256Hex(chunk);
+  for (let attempt = 0; ; attempt++) {
+    try {
+      await axios.put(`${API_BASE_URL}/uploads/${uploadId}?offset=${offset}`, chunk, {
+        headers: { 'Content-Type': 'application/octet-stream', 'X-Chunk-Sha256': hash },
+      });
+      return;
+    } catch (err) {
+      if (attempt >= CHUNK_RETRIES) throw err;
+      await sleep(1000 * 2 ** attempt);
+    }
+  }
+};
+
+// Uploads a file in chunks, resuming where a previous attempt stopped, and starts its extraction job.
+export const uploadResumable = async (
+  file: File,
+  metadata: Metadata,
+  onProgress?: (sentBytes: number, totalBytes: number) => void,
+): Promise<JobStatus> => {
+  let status = await findOrCreateUpload(file, metadata);
+
+  for (let attempt = 0; ; attempt++) {
+    let sent = status.received_bytes;
+    onProgress?.(sent, file.size);
+    for (const [start, end] of missingChunks(status)) {
+      await putChunk(status.upload_id, file, start, end);
+      sent += end - start;
+      onProgress?.(sent, file.size);
+    }
+
+    try {
+      const response = await axios.post<JobStatus>(`${API_BASE_URL}/uploads/${status.upload_id}/finalize`, {});
+      localStorage.removeItem(uploadKey(file));
+      return response.data;
+    } catch (err: any) {
+      // 422: the server dropped the chunks that failed verification - send just those again
+      if (err.response?.status !== 422 || attempt >= FINALIZE_RETRIES) throw err;
+      status = (await axios.get<UploadStatus>(`${API_BASE_URL}/uploads/${status.upload_id}`)).data;
+    }
+  }
+};
+
+// Runs an extraction as a background job, reporting live progress until the result is ready.
+export const extractWithProgress = (
+  file: File,
+  metadata: Metadata,
+  onProgress: (event: JobProgress) => void,
+): Promise<ExtractionResult> => {
+  const upload = file.size > RESUMABLE_THRESHOLD
+    ? uploadResumable(file, metadata, (sent, total) => onProgress({ stage: 'uploading', sent_bytes: sent, total_bytes: total }))
+    : startJob(file, metadata);
+
+  return upload.then((job) => new Promise<ExtractionResult>((resolve, reject) => {
+    subscribeJobEvents(job.job_id, onProgress, (status, error) => {
+      if (status === 'completed') {
+        getJobResult(job.job_id).then(resolve, reject);
+      } else {
+        reject({ response: { data: { detail: error || 'Extraction failed.' } } });
+      }
+    });
+  }));
+};
@@ -0,0 +1,79 @@
+import pytest
+
+from backend import taskqueue
+from backend.taskqueue import SQLiteTaskQueue
+
+# A lease that has already run out when it is handed over
+EXPIRED = -1
+
+@pytest.fixture
+def task_queue(tmp_path):
+    return SQLiteTaskQueue(str(tmp_path / "tasks.db"))
+
+def enqueue(task_queue, job_id="job", page_count=25, pages_per_task=10):
+    return task_queue.enqueue_job(job_id, "/tmp/roll.pdf", page_count, {"district": "Dhaka"}, pages_per_task)
+
+def test_tasks_are_leased_in_page_order(task_queue):
+    assert enqueue(task_queue) == 3
+
+    ranges = []
+    while (task := task_queue.lease("w1")) is not None:
+        ranges.append((task["page_start"], task["page_end"]))
+        assert task["metadata"] == {"district": "Dhaka"}
+
+    assert ranges == [(0, 10), (10, 20), (20, 25)]
+
+def test_results_are_joined_in_task_order(task_queue):
+    enqueue(task_queue, page_count=20)
+    first = task_queue.lease("w1")
+    second = task_queue.lease("w2")
+
+    assert task_queue.complete(second["task_id"], second["lease_token"], [{"name": "B"}])
+    assert task_queue.complete(first["task_id"], first["lease_token"], [{"name": "A"}])
+
+    progress = task_queue.job_progress("job")
+    assert (progress["done_tasks"], progress["done_pages"], progress["voters"]) == (2, 20, 2)
+    assert task_queue.job_results("job") == [{"name": "A"}, {"name": "B"}]
+
+def test_expired_lease_is_handed_out_again_with_a_new_token(task_queue):
+    enqueue(task_queue, page_count=5)
+    stale = task_queue.lease("w1", lease_seconds=EXPIRED)
+
+    fresh = task_queue.lease("w2")
+    assert fresh["task_id"] == stale["task_id"]
+    assert fresh["lease_token"] != stale["lease_token"]
+    assert fresh["attempts"] == 2
+
+    # The worker that lost the lease can no longer touch the task
+    assert not task_queue.heartbeat(stale["task_id"], stale["lease_token"])
+    assert not task_queue.complete(stale["task_id"], stale["lease_token"], [])
+    assert not task_queue.fail(stale["task_id"], stale["lease_token"], "boom")
+    assert task_queue.heartbeat(fresh["task_id"], fresh["lease_token"])
+    assert task_queue.complete(fresh["task_id"], fresh["lease_token"], [])
+
+def test_task_fails_after_max_attempts(task_queue, monkeypatch):
+    monkeypatch.setattr(taskqueue, "MAX_ATTEMPTS", 2)
+    enqueue(task_queue, page_count=5)
+
+    task = task_queue.lease("w1")
+    assert task_queue.fail(task["task_id"], task["lease_token"], "boom")
+    assert task_queue.job_progress("job")["failed"] == 0
+
+    task_queue.lease("w2", lease_seconds=EXPIRED)
+    task_queue.requeue_expired()
+
+    progress = task_queue.job_progress("job")
+    assert progress["failed"] == 1
+    assert progress["error"] == "Task lease expired too many times"
+    assert task_queue.lease("w3") is None
+
+def test_cancel_revokes_leases_and_purge_drops_rows(task_queue):
+    enqueue(task_queue, page_count=20)
+    task = task_queue.lease("w1")
+
+    task_queue.cancel_job("job")
+    assert not task_queue.heartbeat(task["task_id"], task["lease_token"])
+    assert task_queue.lease("w2") is None
+
+    task_queue.purge_job("job")
+    assert task_queue.job_progress("job")["tasks"] == 0
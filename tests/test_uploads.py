@@ -0,0 +1,100 @@
+import hashlib
+import os
+
+import pytest
+
+from backend.uploads import UploadSessionStore, UploadError, MIN_CHUNK_SIZE, positional_write
+
+CHUNK = MIN_CHUNK_SIZE
+# Two whole chunks and a short last one
+DATA = bytes(range(256)) * (CHUNK * 5 // 2 // 256)
+
+@pytest.fixture
+def store(tmp_path):
+    return UploadSessionStore(str(tmp_path))
+
+def create(store, data=DATA):
+    return store.create("roll.pdf", len(data), "", {}, chunk_size=CHUNK)
+
+def write_chunk(store, session, start, data=DATA):
+    """
+    What the PUT endpoint does once a chunk arrived whole and its hash matched.
+    """
+    end = session.chunk_end(start)
+    fd = store.open_for_write(session, start, end - start)
+    try:
+        positional_write(fd, data[start:end], start)
+    finally:
+        os.close(fd)
+    session.record_chunk(start, end, hashlib.sha256(data[start:end]).hexdigest())
+
+def test_chunk_size_is_bounded(store):
+    with pytest.raises(UploadError) as e:
+        store.create("roll.pdf", len(DATA), "", {}, chunk_size=CHUNK - 1)
+    assert e.value.status_code == 400
+
+def test_offsets_must_be_chunk_aligned(store):
+    session = create(store)
+    with pytest.raises(UploadError) as e:
+        store.open_for_write(session, CHUNK // 2, CHUNK)
+    assert e.value.status_code == 400
+
+def test_chunks_must_be_whole(store):
+    session = create(store)
+    with pytest.raises(UploadError) as e:
+        store.open_for_write(session, 0, CHUNK - 1)
+    assert e.value.status_code == 400
+
+    # The short last chunk is whole when it runs to the end of the file
+    last = 2 * CHUNK
+    os.close(store.open_for_write(session, last, len(DATA) - last))
+
+def test_chunks_in_any_order_verify(store):
+    session = create(store)
+    for start in (2 * CHUNK, 0, CHUNK):
+        write_chunk(store, session, start)
+
+    session = store.get(session.upload_id)
+    assert session.complete
+    store.verify(session)
+
+def test_incomplete_upload_cannot_be_verified(store):
+    session = create(store)
+    write_chunk(store, session, 0)
+
+    with pytest.raises(UploadError) as e:
+        store.verify(store.get(session.upload_id))
+    assert e.value.status_code == 409
+
+def test_only_corrupted_chunks_are_sent_again(store):
+    session = create(store)
+    for start in range(0, len(DATA), CHUNK):
+        write_chunk(store, session, start)
+
+    # Damage the middle chunk on disk after it was accepted
+    with open(session.part_path, "r+b") as f:
+        f.seek(CHUNK + 10)
+        f.write(b"\x00\xff")
+
+    session = store.get(session.upload_id)
+    with pytest.raises(UploadError) as e:
+        store.verify(session)
+    assert e.value.status_code == 422
+
+    session = store.get(session.upload_id)
+    assert session.state["ranges"] == [[0, CHUNK], [2 * CHUNK, len(DATA)]]
+    assert session.next_offset() == CHUNK
+
+    write_chunk(store, session, CHUNK)
+    store.verify(store.get(session.upload_id))
+
+def test_whole_file_hash_still_supported(store):
+    session = store.create("roll.pdf", len(DATA), hashlib.sha256(DATA).hexdigest(), {})
+    fd = store.open_for_write(session, 0, len(DATA))
+    try:
+        positional_write(fd, DATA, 0)
+    finally:
+        os.close(fd)
+    session.record_chunk(0, len(DATA))
+
+    store.verify(store.get(session.upload_id))